@@ -1,5 +1,6 @@
 import asyncio
 import importlib
+import time
 
 from pyrogram import idle
 from pytgcalls.exceptions import NoActiveGroupCall
@@ -10,17 +11,53 @@ from XMUSIC.core.call import JARVIS
 from XMUSIC.misc import sudo
 from XMUSIC.plugins import ALL_MODULES
 from XMUSIC.utils.database import get_banned_users, get_gbanned
+from XMUSIC.utils.stream import snapshot
+from XMUSIC.utils.tuning import RESUME_ON_BOOT
 from config import BANNED_USERS
 
+_background = set()
+
+
+def _spawn(coro):
+    task = asyncio.create_task(coro)
+    _background.add(task)
+    task.add_done_callback(_background.discard)
+    return task
+
+
+def _timed(name, since):
+    now = time.monotonic()
+    LOGGER("XMUSIC").info(f"{name} ready in {now - since:.2f}s")
+    return now
+
+
+async def log_group_call():
+    try:
+        await JARVIS.stream_call(
+            "http://docs.evostream.com/sample_content/assets/sintel1m720p.mp4"
+        )
+    except NoActiveGroupCall:
+        LOGGER("XMUSIC").error(
+            "ᴘʟᴇᴀsᴇ ᴛᴜʀɴ ᴏɴ ᴛʜᴇ ᴠᴏɪᴄᴇ ᴄʜᴀᴛ ᴏғ ʏᴏᴜʀ ʟᴏɢ ɢʀᴏᴜᴘ/ᴄʜᴀɴɴᴇʟ."
+        )
+    except:
+        pass
+
+
+async def resume_chats():
+    if RESUME_ON_BOOT:
+        started = time.monotonic()
+        try:
+            await snapshot.restore()
+        except Exception as e:
+            LOGGER("XMUSIC").warning(f"Queue restore failed: {e}")
+        _timed("Queue restore", started)
+    snapshot.start()
+
 
 async def init():
-    if (
-        not config.STRING1
-        and not config.STRING2
-        and not config.STRING3
-        and not config.STRING4
-        and not config.STRING5
-    ):
+    started = time.monotonic()
+    if not any(config.STRING_SESSIONS):
         LOGGER(__name__).error(
             "ᴀssɪsᴛᴀɴᴛ sᴇssɪᴏɴ ɴᴏᴛ ғɪʟʟᴇᴅ, ᴘʟᴇᴀsᴇ ғɪʟʟ ᴀ ᴘʏʀᴏɢʀᴀᴍ sᴇssɪᴏɴ..."
         )
@@ -38,29 +75,25 @@ async def init():
     except:
         pass
 
+    phase = _timed("Sudoers and bans", started)
     await app.start()
     for all_module in ALL_MODULES:
         importlib.import_module("XMUSIC.plugins" + all_module)
 
     LOGGER("XMUSIC.plugins").info("ᴍᴏᴅᴜʟᴇs ʟᴏᴀᴅᴇᴅ...")
+    phase = _timed("Bot and plugins", phase)
 
     await userbot.start()
+    phase = _timed("Assistants", phase)
     await JARVIS.start()
-
-    try:
-        await JARVIS.stream_call(
-            "http://docs.evostream.com/sample_content/assets/sintel1m720p.mp4"
-        )
-    except NoActiveGroupCall:
-        LOGGER("XMUSIC").error(
-            "ᴘʟᴇᴀsᴇ ᴛᴜʀɴ ᴏɴ ᴛʜᴇ ᴠᴏɪᴄᴇ ᴄʜᴀᴛ ᴏғ ʏᴏᴜʀ ʟᴏɢ ɢʀᴏᴜᴘ/ᴄʜᴀɴɴᴇʟ.\n\nᴀɴɴɪᴇ ʙᴏᴛ sᴛᴏᴘᴘᴇᴅ..."
-        )
-        exit()
-    except:
-        pass
-
     await JARVIS.decorators()
-    LOGGER("XMUSIC").info("ᴍᴜsɪᴄ ʀᴏʙᴏᴛ sᴛᴀʀᴛᴇᴅ sᴜᴄᴄᴇssғᴜʟʟʏ...")
+    phase = _timed("PyTgCalls clients", phase)
+
+    _spawn(log_group_call())
+    _spawn(resume_chats())
+    LOGGER("XMUSIC").info(
+        f"ᴍᴜsɪᴄ ʀᴏʙᴏᴛ sᴛᴀʀᴛᴇᴅ sᴜᴄᴄᴇssғᴜʟʟʏ in {time.monotonic() - started:.2f}s..."
+    )
     await idle()
     await app.stop()
     await userbot.stop()
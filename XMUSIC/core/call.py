@@ -1,43 +1,104 @@
 import asyncio
+import itertools
 import os
-from datetime import datetime, timedelta
 from typing import Union
 from pyrogram import Client
 from pyrogram.types import InlineKeyboardMarkup, InlineKeyboardButton
 from pytgcalls import PyTgCalls
 from pytgcalls.exceptions import NoActiveGroupCall
 from ntgcalls import TelegramServerError
-from pytgcalls.types import Update, StreamEnded, GroupCallParticipant
+from pytgcalls.types import Update, StreamEnded, GroupCallParticipant, UpdatedGroupCallParticipant
 from pytgcalls import filters as fl
-from pytgcalls.types import AudioQuality, VideoQuality
+from pytgcalls.types import AudioQuality
 from pytgcalls.types import MediaStream, ChatUpdate
 import config
 from config import autoclean
 from XMUSIC import LOGGER, YouTube, app
+from XMUSIC.core.userbot import ALIASES, sessions
 from XMUSIC.misc import db
 from XMUSIC.utils.database import (
     add_active_chat,
     add_active_video_chat,
+    assistantdict,
+    get_call_owner,
     get_lang,
     get_loop,
     group_assistant,
+    is_active_chat,
     is_autoend,
     music_on,
+    record_assistant_result,
     remove_active_chat,
+    remove_call_owner,
+    set_call_owner,
     remove_active_video_chat,
     set_loop,
 )
 from XMUSIC.utils.exceptions import AssistantErr
-from XMUSIC.utils.formatters import check_duration, seconds_to_min, speed_converter
+from XMUSIC.utils import keyframes, media_cache, metrics
+from XMUSIC.utils.formatters import seconds_to_min, time_to_seconds
 from XMUSIC.utils.inline.play import stream_markup
+from XMUSIC.utils.quality import media_stream
+from XMUSIC.utils.stream import prefetch
+from XMUSIC.utils.stream.autoclear import auto_clean
+from XMUSIC.utils.stream.chatqueue import ChatQueue
 from XMUSIC.utils.thumbnails import get_thumb as gen_thumb
+from XMUSIC.utils.tuning import AUTO_END_DELAY, PROGRESSIVE_STALL, SEEK_COALESCE
 from strings import get_string
 
 autoend = {}
 counter = {}
+_seeks = {}
+_seek_ids = itertools.count()
+
+def _localise(entry, path):
+    # Point a downloaded vid_ entry at its local file so seeks and loop
+    # replays read it instead of resolving the stream again.
+    if "vid_" not in str(entry["file"]) or not os.path.isfile(str(path)):
+        return
+    try:
+        autoclean.remove(entry["file"])
+    except ValueError:
+        pass
+    autoclean.append(path)
+    entry["file"] = path
+
+
+async def _settled(path):
+    # A progressive download is queued under its final path before that file
+    # exists. Anything that needs the whole file (seek, speed, replays) waits
+    # for the commit instead of handing ffmpeg a missing path.
+    if isinstance(path, str) and media_cache.managed(path) and not os.path.isfile(path):
+        return await YouTube.wait_download(path) or path
+    return path
+
+
+def _me(client):
+    try:
+        return client.mtproto_client.me.id
+    except Exception:
+        return None
+
+
+async def _listeners(client, chat_id):
+    # Everyone in the call except the assistant that is playing to it.
+    me = _me(client)
+    participants = await client.get_participants(chat_id) or []
+    return sum(1 for participant in participants if participant.user_id != me)
+
+
+def _cancel_autoend(chat_id):
+    timer = autoend.pop(chat_id, None)
+    if timer:
+        timer.cancel()
+
 
 async def _clear_(chat_id):
-    db[chat_id] = []
+    prefetch.cancel(chat_id)
+    _cancel_autoend(chat_id)
+    counter.pop(chat_id, None)
+    await remove_call_owner(chat_id)
+    db[chat_id] = ChatQueue()
     await remove_active_video_chat(chat_id)
     await remove_active_chat(chat_id)
 
@@ -55,29 +116,97 @@ async def safe_delete(message, delay=0):
 async def cleanup_all_messages(chat_id: int):
     pass
 
+_tasks = set()
+
+
+def _spawn(coro):
+    task = asyncio.create_task(_isolated(coro))
+    _tasks.add(task)
+    task.add_done_callback(_tasks.discard)
+
+
+async def _isolated(coro):
+    try:
+        await coro
+    except Exception as e:
+        LOGGER(__name__).warning(f"Background stream task failed: {e}")
+
+
+async def _send_queue_ended(chat_id):
+    buttons = InlineKeyboardMarkup(
+        [
+            [
+                InlineKeyboardButton(
+                    "✙ ᴀᴅᴅ ᴍᴇ ʙᴀʙʏ ✙",
+                    url=f"https://t.me/{app.username}?startgroup=true"
+                ),
+                InlineKeyboardButton(
+                    "⌯ ᴄʟᴏsᴇ ⌯",
+                    callback_data="close"
+                )
+            ]
+        ]
+    )
+    await app.send_message(chat_id, "🎙️", reply_markup=buttons)
+
+
+async def _send_failed(chat_id, playing):
+    language = await get_lang(chat_id)
+    _ = get_string(language)
+    await app.send_message(playing["chat_id"], text=_["call_6"])
+
+
+def _speed_parameters(speed, video):
+    # --audio/--video scope options to one of pytgcalls' two ffmpeg processes
+    # and -atmid places them after the input, so the tempo change happens
+    # live on the stream instead of in a transcode. Video is retimed on the
+    # input side because pytgcalls appends its own -vf scale, which would
+    # replace any video filter given here.
+    params = f"--audio -atmid -filter:a atempo={speed}"
+    if video:
+        params += f" --video -itsscale {1 / speed:.4f}"
+    return params
+
+
 class Call(PyTgCalls):
     def __init__(self):
-        self.userbot1 = Client(name="JARVISAss1", api_id=config.API_ID, api_hash=config.API_HASH, session_string=str(config.STRING1))
-        self.one = PyTgCalls(self.userbot1, cache_duration=100)
-        self.userbot2 = Client(name="JARVISAss2", api_id=config.API_ID, api_hash=config.API_HASH, session_string=str(config.STRING2))
-        self.two = PyTgCalls(self.userbot2, cache_duration=100)
-        self.userbot3 = Client(name="JARVISAss3", api_id=config.API_ID, api_hash=config.API_HASH, session_string=str(config.STRING3))
-        self.three = PyTgCalls(self.userbot3, cache_duration=100)
-        self.userbot4 = Client(name="JARVISAss4", api_id=config.API_ID, api_hash=config.API_HASH, session_string=str(config.STRING4))
-        self.four = PyTgCalls(self.userbot4, cache_duration=100)
-        self.userbot5 = Client(name="JARVISAss5", api_id=config.API_ID, api_hash=config.API_HASH, session_string=str(config.STRING5))
-        self.five = PyTgCalls(self.userbot5, cache_duration=100)
+        self.userbots = {}
+        self.clients = {}
+        for index, string in sessions():
+            self.userbots[index] = Client(name=f"JARVISAss{index}", api_id=config.API_ID, api_hash=config.API_HASH, session_string=str(string))
+            self.clients[index] = PyTgCalls(self.userbots[index], cache_duration=100)
+        for index, name in enumerate(ALIASES, start=1):
+            setattr(self, f"userbot{index}", self.userbots.get(index))
+            setattr(self, name, self.clients.get(index))
+
+    def get(self, index: int):
+        return self.clients.get(int(index))
 
     async def pause_stream(self, chat_id: int):
-        assistant = await group_assistant(self, chat_id)
+        assistant = await self._owner(chat_id)
         await assistant.pause(chat_id)
+        playing = db.get(chat_id)
+        if playing:
+            playing[0].pause_clock()
 
     async def resume_stream(self, chat_id: int):
-        assistant = await group_assistant(self, chat_id)
+        assistant = await self._owner(chat_id)
         await assistant.resume(chat_id)
+        playing = db.get(chat_id)
+        if playing:
+            playing[0].resume_clock()
+
+    async def _owner(self, chat_id: int):
+        # The assistant that actually joined the call, falling back to the
+        # chat's placement when the call was started outside join_call. The
+        # owner is only dropped once the call is left, in _clear_.
+        number = await get_call_owner(chat_id)
+        if number is not None and self.get(number):
+            return self.get(number)
+        return await group_assistant(self, chat_id)
 
     async def stop_stream(self, chat_id: int):
-        assistant = await group_assistant(self, chat_id)
+        assistant = await self._owner(chat_id)
         try:
             await _clear_(chat_id)
             await assistant.leave_call(chat_id)
@@ -86,28 +215,8 @@ class Call(PyTgCalls):
 
     async def stop_stream_force(self, chat_id: int):
         try:
-            if config.STRING1:
-                await self.one.leave_call(chat_id)
-        except:
-            pass
-        try:
-            if config.STRING2:
-                await self.two.leave_call(chat_id)
-        except:
-            pass
-        try:
-            if config.STRING3:
-                await self.three.leave_call(chat_id)
-        except:
-            pass
-        try:
-            if config.STRING4:
-                await self.four.leave_call(chat_id)
-        except:
-            pass
-        try:
-            if config.STRING5:
-                await self.five.leave_call(chat_id)
+            assistant = await self._owner(chat_id)
+            await assistant.leave_call(chat_id)
         except:
             pass
         try:
@@ -115,79 +224,103 @@ class Call(PyTgCalls):
         except:
             pass
 
+    @metrics.timed("call.speedup")
     async def speedup_stream(self, chat_id: int, file_path, speed, playing):
-        assistant = await group_assistant(self, chat_id)
-        if str(speed) != str("1.0"):
-            base = os.path.basename(file_path)
-            chatdir = os.path.join(os.getcwd(), "playback", str(speed))
-            if not os.path.isdir(chatdir):
-                os.makedirs(chatdir)
-            out = os.path.join(chatdir, base)
-            if not os.path.isfile(out):
-                if str(speed) == str("0.5"):
-                    vs = 2.0
-                elif str(speed) == str("0.75"):
-                    vs = 1.35
-                elif str(speed) == str("1.5"):
-                    vs = 0.68
-                elif str(speed) == str("2.0"):
-                    vs = 0.5
-                else:
-                    vs = 1.0
-                proc = await asyncio.create_subprocess_shell(
-                    cmd=(f"ffmpeg -i {file_path} -filter:v setpts={vs}*PTS -filter:a atempo={speed} -c:a libopus -b:a 192k -vbr on -compression_level 10 {out}"),
-                    stdin=asyncio.subprocess.PIPE,
-                    stderr=asyncio.subprocess.PIPE,
-                )
-                await proc.communicate()
-        else:
-            out = file_path
-        dur = await asyncio.get_event_loop().run_in_executor(None, check_duration, out)
-        dur = int(dur)
-        played, con_seconds = speed_converter(playing[0]["played"], speed)
-        duration = seconds_to_min(dur)
-        stream = (MediaStream(out, audio_parameters=AudioQuality.HIGH, video_parameters=VideoQuality.FHD_1080p, ffmpeg_parameters=f"-ss {played} -to {duration}") if playing[0]["streamtype"] == "video" else MediaStream(out, audio_parameters=AudioQuality.HIGH, ffmpeg_parameters=f"-ss {played} -to {duration}", video_flags=MediaStream.Flags.IGNORE))
+        assistant = await self._owner(chat_id)
+        entry = playing[0]
+        factor = float(speed)
+        # played/seconds/dur are kept on the sped-up timeline, as before, so
+        # seek and the progress bar need no special casing.
+        position = int(entry["played"]) * float(entry.get("speed") or 1.0)
+        seconds = int(entry.get("old_second") or entry["seconds"])
+        video = entry["streamtype"] == "video"
+        params = f"-ss {int(position)}"
+        if factor != 1.0:
+            params += f" {_speed_parameters(factor, video)}"
+        source = await _settled(file_path)
+        stream = await media_stream(chat_id, source, video, params)
         if str(db[chat_id][0]["file"]) == str(file_path):
             await assistant.play(chat_id, stream)
         else:
             raise AssistantErr("Umm")
         if str(db[chat_id][0]["file"]) == str(file_path):
-            exis = (playing[0]).get("old_dur")
+            exis = entry.get("old_dur")
             if not exis:
                 db[chat_id][0]["old_dur"] = db[chat_id][0]["dur"]
                 db[chat_id][0]["old_second"] = db[chat_id][0]["seconds"]
-            db[chat_id][0]["played"] = con_seconds
-            db[chat_id][0]["dur"] = duration
-            db[chat_id][0]["seconds"] = dur
-            db[chat_id][0]["speed_path"] = out
+            db[chat_id][0]["played"] = int(position / factor)
+            db[chat_id][0]["dur"] = seconds_to_min(int(seconds / factor))
+            db[chat_id][0]["seconds"] = int(seconds / factor)
+            db[chat_id][0]["speed_path"] = None
             db[chat_id][0]["speed"] = speed
 
     async def force_stop_stream(self, chat_id: int):
-        assistant = await group_assistant(self, chat_id)
+        assistant = await self._owner(chat_id)
         try:
             check = db.get(chat_id)
             check.pop(0)
+            prefetch.schedule(chat_id)
         except:
             pass
         await remove_active_video_chat(chat_id)
         await remove_active_chat(chat_id)
         try:
-            await assistant.leave_group_call(chat_id)
+            await assistant.leave_call(chat_id)
         except:
             pass
+        await remove_call_owner(chat_id)
 
+    @metrics.timed("call.skip")
     async def skip_stream(self, chat_id: int, link: str, video: Union[bool, str] = None, image: Union[bool, str] = None):
-        assistant = await group_assistant(self, chat_id)
-        if video:
-            stream = MediaStream(link, audio_parameters=AudioQuality.HIGH, video_parameters=VideoQuality.FHD_1080p)
-        else:
-            stream = MediaStream(link, audio_parameters=AudioQuality.HIGH, video_flags=MediaStream.Flags.IGNORE)
+        assistant = await self._owner(chat_id)
+        link = await _settled(link)
+        stream = await media_stream(chat_id, link, video)
         await assistant.play(chat_id, stream)
+        playing = db.get(chat_id)
+        if playing:
+            playing[0]["played"] = 0
+            _localise(playing[0], link)
 
+    @metrics.timed("call.seek")
     async def seek_stream(self, chat_id, file_path, to_seek, duration, mode):
-        assistant = await group_assistant(self, chat_id)
-        stream = (MediaStream(file_path, audio_parameters=AudioQuality.HIGH, video_parameters=VideoQuality.FHD_1080p, ffmpeg_parameters=f"-ss {to_seek} -to {duration}") if mode == "video" else MediaStream(file_path, audio_parameters=AudioQuality.HIGH, video_flags=MediaStream.Flags.IGNORE, ffmpeg_parameters=f"-ss {to_seek} -to {duration}"))
-        await assistant.play(chat_id, stream)
+        assistant = await self._owner(chat_id)
+        playing = db.get(chat_id)
+        if not playing:
+            raise AssistantErr("Nothing is playing")
+        entry = playing[0]
+        previous = entry["played"]
+        target = time_to_seconds(to_seek)
+        # Record the target right away so a follow-up seek builds on it, then
+        # give rapid repeats a moment to supersede this one.
+        entry["played"] = target
+        token = _seeks[chat_id] = next(_seek_ids)
+        await asyncio.sleep(SEEK_COALESCE)
+        if _seeks.get(chat_id) != token:
+            return None
+        _seeks.pop(chat_id, None)
+        playing = db.get(chat_id)
+        if not playing or playing[0] is not entry:
+            return None
+        speed = float(entry.get("speed") or 1.0)
+        video = mode == "video"
+        file_path = await _settled(file_path)
+        start = target * speed
+        if video:
+            snapped = keyframes.nearest(file_path, start)
+            if snapped is not None:
+                start = snapped
+        params = f"-ss {start:.3f}"
+        if speed != 1.0:
+            params += f" {_speed_parameters(speed, video)}"
+        try:
+            stream = await media_stream(chat_id, file_path, video, params)
+            with metrics.span("call.seek.play"):
+                await assistant.play(chat_id, stream)
+        except:
+            entry["played"] = previous
+            raise
+        entry["played"] = int(start / speed)
+        return entry["played"]
 
     async def stream_call(self, link):
         assistant = await group_assistant(self, config.LOGGER_ID)
@@ -195,39 +328,99 @@ class Call(PyTgCalls):
         await asyncio.sleep(0.2)
         await assistant.leave_call(config.LOGGER_ID)
 
-    async def join_call(self, chat_id: int, original_chat_id: int, link, video: Union[bool, str] = None, image: Union[bool, str] = None):
-        assistant = await group_assistant(self, chat_id)
+    @metrics.timed("call.join")
+    async def join_call(self, chat_id: int, original_chat_id: int, link, video: Union[bool, str] = None, image: Union[bool, str] = None, duration: int = None, offset: int = None):
+        with metrics.span("call.join.assistant"):
+            assistant = await group_assistant(self, chat_id)
         language = await get_lang(chat_id)
         _ = get_string(language)
-        if video:
-            stream = MediaStream(link, audio_parameters=AudioQuality.HIGH, video_parameters=VideoQuality.FHD_1080p)
+        # Following a growing file needs an end bound: without -t, ffmpeg sits
+        # at EOF for PROGRESSIVE_STALL seconds after the part is renamed.
+        part = YouTube.growing(link) if isinstance(link, str) and duration else None
+        if part:
+            # Play the part file while it is still being written: ffmpeg keeps
+            # reading at EOF and gives up after PROGRESSIVE_STALL seconds.
+            params = f"-follow 1 -rw_timeout {PROGRESSIVE_STALL * 1000000} -t {duration}"
+            stream = await media_stream(chat_id, part, video, params)
         else:
-            stream = MediaStream(link, audio_parameters=AudioQuality.HIGH, video_flags=MediaStream.Flags.IGNORE)
+            link = await _settled(link)
+            stream = await media_stream(chat_id, link, video, f"-ss {offset}" if offset else None)
+        number = assistantdict.get(chat_id)
         try:
-            await assistant.play(chat_id, stream)
+            with metrics.span("call.join.play"):
+                await assistant.play(chat_id, stream)
         except NoActiveGroupCall:
             raise AssistantErr(_["call_8"])
         except TelegramServerError:
+            record_assistant_result(number, False)
             raise AssistantErr(_["call_10"])
         except Exception as e:
-            raise AssistantErr(str(e))
+            if not part or not await YouTube.wait_download(link):
+                record_assistant_result(number, False)
+                raise AssistantErr(str(e))
+            try:
+                await assistant.play(chat_id, await media_stream(chat_id, link, video))
+            except Exception as e:
+                record_assistant_result(number, False)
+                raise AssistantErr(str(e))
+        record_assistant_result(number, True)
+        await set_call_owner(chat_id, number)
         await add_active_chat(chat_id)
         await music_on(chat_id)
         if video:
             await add_active_video_chat(chat_id)
+        try:
+            # Seed the listener count once; participant updates keep it
+            # current from here on.
+            counter[chat_id] = await _listeners(assistant, chat_id)
+        except:
+            pass
         if await is_autoend():
-            counter[chat_id] = {}
-            users = len(await assistant.get_participants(chat_id))
-            if users == 1:
-                autoend[chat_id] = datetime.now() + timedelta(minutes=1)
+            self._watch_listeners(chat_id)
 
+    def _watch_listeners(self, chat_id: int):
+        # Only chats where nobody is listening hold a timer.
+        if counter.get(chat_id, 0) > 0:
+            return _cancel_autoend(chat_id)
+        if chat_id not in autoend:
+            autoend[chat_id] = asyncio.get_running_loop().call_later(
+                AUTO_END_DELAY, lambda: _spawn(self._auto_end(chat_id))
+            )
+
+    def autoend_changed(self, enabled: bool):
+        # Calls that were already empty when auto-end was switched on get
+        # their timer now instead of on the next participant update.
+        for chat_id in list(counter):
+            if enabled:
+                self._watch_listeners(chat_id)
+            else:
+                _cancel_autoend(chat_id)
+
+    async def _auto_end(self, chat_id: int):
+        autoend.pop(chat_id, None)
+        if not await is_autoend() or not await is_active_chat(chat_id):
+            return
+        assistant = await self._owner(chat_id)
+        try:
+            counter[chat_id] = await _listeners(assistant, chat_id)
+        except:
+            pass
+        if counter.get(chat_id, 0) > 0:
+            return
+        await self.stop_stream(chat_id)
+        try:
+            await app.send_message(
+                chat_id,
+                "» ʙᴏᴛ ᴀᴜᴛᴏᴍᴀᴛɪᴄᴀʟʟʏ ʟᴇғᴛ ᴠɪᴅᴇᴏᴄʜᴀᴛ ʙᴇᴄᴀᴜsᴇ ɴᴏ ᴏɴᴇ ᴡᴀs ʟɪsᴛᴇɴɪɴɢ ᴏɴ ᴠɪᴅᴇᴏᴄʜᴀᴛ."
+            )
+        except:
+            pass
+
+    @metrics.timed("call.change")
     async def change_stream(self, client, chat_id):
         check = db.get(chat_id)
         popped = None
         loop = await get_loop(chat_id)
-        
-        await asyncio.sleep(0.05)
-        
         try:
             if loop == 0:
                 popped = check.pop(0)
@@ -235,171 +428,141 @@ class Call(PyTgCalls):
                 loop = loop - 1
                 await set_loop(chat_id, loop)
             if popped:
-                rem = popped["file"]
-                autoclean.remove(rem)
+                _spawn(self._after_pop(chat_id, popped))
             if not check:
                 await _clear_(chat_id)
-                
-                buttons = InlineKeyboardMarkup(
-                    [
-                        [
-                            InlineKeyboardButton(
-                                "✙ ᴀᴅᴅ ᴍᴇ ʙᴀʙʏ ✙", 
-                                url=f"https://t.me/{app.username}?startgroup=true"
-                            ),
-                            InlineKeyboardButton(
-                                "⌯ ᴄʟᴏsᴇ ⌯", 
-                                callback_data="close"
-                            )
-                        ]
-                    ]
-                )
-                await app.send_message(
-                    chat_id,
-                    "🎙️",
-                    reply_markup=buttons
-                )
+                _spawn(_send_queue_ended(chat_id))
                 return await client.leave_call(chat_id)
         except:
             try:
                 await _clear_(chat_id)
-                
-                buttons = InlineKeyboardMarkup(
-                    [
-                        [
-                            InlineKeyboardButton(
-                                "✙ ᴀᴅᴅ ᴍᴇ ʙᴀʙʏ ✙", 
-                                url=f"https://t.me/{app.username}?startgroup=true"
-                            ),
-                            InlineKeyboardButton(
-                                "⌯ ᴄʟᴏsᴇ ⌯", 
-                                callback_data="close"
-                            )
-                        ]
-                    ]
-                )
-                await app.send_message(
-                    chat_id,
-                    "🎙️",
-                    reply_markup=buttons
-                )
+                _spawn(_send_queue_ended(chat_id))
                 return await client.leave_call(chat_id)
             except:
                 return
-        
-        queued = check[0]["file"]
-        language = await get_lang(chat_id)
-        _ = get_string(language)
-        title = (check[0]["title"]).title()
-        user = check[0]["by"]
-        user_id = check[0]["user_id"]
-        original_chat_id = check[0]["chat_id"]
-        streamtype = check[0]["streamtype"]
-        videoid = check[0]["vidid"]
-        db[chat_id][0]["played"] = 0
-        exis = (check[0]).get("old_dur")
+
+        playing = check[0]
+        queued = playing["file"]
+        streamtype = playing["streamtype"]
+        videoid = playing["vidid"]
+        exis = playing.get("old_dur")
         if exis:
-            db[chat_id][0]["dur"] = exis
-            db[chat_id][0]["seconds"] = check[0]["old_second"]
-            db[chat_id][0]["speed_path"] = None
-            db[chat_id][0]["speed"] = 1.0
+            playing["dur"] = exis
+            playing["seconds"] = playing["old_second"]
+            playing["speed_path"] = None
+            playing["speed"] = 1.0
         video = True if str(streamtype) == "video" else False
-        
+
+        # Swap the stream as soon as the source is known; everything the
+        # listeners do not hear is left to _announce.
         if "live_" in queued:
-            n, link = await YouTube.video(videoid, True)
-            if n == 0:
-                return await app.send_message(original_chat_id, text=_["call_6"])
-            if video:
-                stream = MediaStream(link, audio_parameters=AudioQuality.HIGH, video_parameters=VideoQuality.FHD_1080p)
-            else:
-                stream = MediaStream(link, audio_parameters=AudioQuality.HIGH, video_flags=MediaStream.Flags.IGNORE)
+            with metrics.span("call.change.resolve"):
+                n, link = await YouTube.video(videoid, True)
+            source = link if n else None
+        elif "vid_" in queued:
             try:
-                await client.play(chat_id, stream)
+                with metrics.span("call.change.download"):
+                    source, direct = await YouTube.download(videoid, None, videoid=True, video=True if video else None)
             except:
-                return await app.send_message(original_chat_id, text=_["call_6"])
-            img = await get_thumb(videoid, user_id)
-            button = stream_markup(_, chat_id)
-            run = await app.send_photo(chat_id=original_chat_id, photo=img, caption=_["stream_1"].format(f"https://t.me/{app.username}?start=info_{videoid}", title[:23], check[0]["dur"], user, "🎥 Vɪᴅᴇᴏ" if video else "🎵 Aᴜᴅɪᴏ"), reply_markup=InlineKeyboardMarkup(button))
-            db[chat_id][0]["mystic"] = run
-            db[chat_id][0]["markup"] = "tg"
+                source = None
         elif "index_" in queued:
-            stream = (MediaStream(videoid, audio_parameters=AudioQuality.HIGH, video_parameters=VideoQuality.FHD_1080p) if str(streamtype) == "video" else MediaStream(videoid, audio_parameters=AudioQuality.HIGH, video_flags=MediaStream.Flags.IGNORE))
-            try:
-                await client.play(chat_id, stream)
-            except:
-                return await app.send_message(original_chat_id, text=_["call_6"])
-            button = stream_markup(_, chat_id)
-            run = await app.send_photo(chat_id=original_chat_id, photo=config.STREAM_IMG_URL, caption=_["stream_2"].format(user), reply_markup=InlineKeyboardMarkup(button))
-            db[chat_id][0]["mystic"] = run
-            db[chat_id][0]["markup"] = "tg"
+            source = videoid
         else:
-            if video:
-                stream = MediaStream(queued, audio_parameters=AudioQuality.HIGH, video_parameters=VideoQuality.FHD_1080p)
-            else:
-                stream = MediaStream(queued, audio_parameters=AudioQuality.HIGH, video_flags=MediaStream.Flags.IGNORE)
-            try:
+            source = await _settled(queued)
+        if not source:
+            return _spawn(_send_failed(chat_id, playing))
+        try:
+            stream = await media_stream(chat_id, source, video)
+            with metrics.span("call.change.play"):
                 await client.play(chat_id, stream)
-            except:
-                return await app.send_message(original_chat_id, text=_["call_6"])
-            if videoid == "telegram":
-                button = stream_markup(_, chat_id)
-                run = await app.send_photo(chat_id=original_chat_id, photo=config.TELEGRAM_AUDIO_URL if str(streamtype) == "audio" else config.TELEGRAM_VIDEO_URL, caption=_["stream_1"].format(config.SUPPORT_CHAT, title[:23], check[0]["dur"], user, "🎥 Vɪᴅᴇᴏ" if video else "🎵 Aᴜᴅɪᴏ"), reply_markup=InlineKeyboardMarkup(button))
-                db[chat_id][0]["mystic"] = run
-                db[chat_id][0]["markup"] = "tg"
-            elif videoid == "soundcloud":
-                button = stream_markup(_, chat_id)
-                run = await app.send_photo(chat_id=original_chat_id, photo=config.SOUNCLOUD_IMG_URL, caption=_["stream_1"].format(config.SUPPORT_CHAT, title[:23], check[0]["dur"], user, "🎥 Vɪᴅᴇᴏ" if video else "🎵 Aᴜᴅɪᴏ"), reply_markup=InlineKeyboardMarkup(button))
-                db[chat_id][0]["mystic"] = run
-                db[chat_id][0]["markup"] = "tg"
+        except:
+            return _spawn(_send_failed(chat_id, playing))
+        # Start the position clock only once the new track is audible.
+        playing["played"] = 0
+        _localise(playing, source)
+        _spawn(self._announce(chat_id, playing))
+
+    async def _after_pop(self, chat_id, popped):
+        await auto_clean(popped)
+        prefetch.schedule(chat_id)
+
+    @metrics.timed("call.announce")
+    async def _announce(self, chat_id, playing):
+        language = await get_lang(chat_id)
+        _ = get_string(language)
+        queued = playing["file"]
+        title = (playing["title"]).title()
+        user = playing["by"]
+        original_chat_id = playing["chat_id"]
+        streamtype = playing["streamtype"]
+        videoid = playing["vidid"]
+        video = True if str(streamtype) == "video" else False
+        mode = "🎥 Vɪᴅᴇᴏ" if video else "🎵 Aᴜᴅɪᴏ"
+        button = stream_markup(_, chat_id)
+        if "index_" in queued:
+            photo, markup = config.STREAM_IMG_URL, "tg"
+            caption = _["stream_2"].format(user)
+        elif videoid in ("telegram", "soundcloud") and "live_" not in queued and "vid_" not in queued:
+            if videoid == "soundcloud":
+                photo = config.SOUNCLOUD_IMG_URL
+            elif str(streamtype) == "audio":
+                photo = config.TELEGRAM_AUDIO_URL
             else:
-                img = await get_thumb(videoid, user_id)
-                button = stream_markup(_, chat_id)
-                run = await app.send_photo(chat_id=original_chat_id, photo=img, caption=_["stream_1"].format(f"https://t.me/{app.username}?start=info_{videoid}", title[:23], check[0]["dur"], user, "🎥 Vɪᴅᴇᴏ" if video else "🎵 Aᴜᴅɪᴏ"), reply_markup=InlineKeyboardMarkup(button))
-                db[chat_id][0]["mystic"] = run
-                db[chat_id][0]["markup"] = "stream"
+                photo = config.TELEGRAM_VIDEO_URL
+            markup = "tg"
+            caption = _["stream_1"].format(config.SUPPORT_CHAT, title[:23], playing["dur"], user, mode)
+        else:
+            with metrics.span("call.announce.thumbnail"):
+                photo = await gen_thumb(videoid)
+            markup = "tg" if "live_" in queued else "stream"
+            caption = _["stream_1"].format(f"https://t.me/{app.username}?start=info_{videoid}", title[:23], playing["dur"], user, mode)
+        with metrics.span("call.announce.send_photo"):
+            run = await app.send_photo(chat_id=original_chat_id, photo=photo, caption=caption, reply_markup=InlineKeyboardMarkup(button))
+        playing["mystic"] = run
+        playing["markup"] = markup
 
     async def ping(self):
-        pings = []
-        if config.STRING1:
-            pings.append(self.one.ping)
-        if config.STRING2:
-            pings.append(self.two.ping)
-        if config.STRING3:
-            pings.append(self.three.ping)
-        if config.STRING4:
-            pings.append(self.four.ping)
-        if config.STRING5:
-            pings.append(self.five.ping)
+        pings = [client.ping for client in self.clients.values()]
         return str(round(sum(pings) / len(pings), 3))
 
     async def start(self):
         LOGGER(__name__).info("» sᴛᴀʀᴛɪɴɢ ᴘʏᴛɢᴄᴀʟʟs ᴄʟɪᴇɴᴛ...")
-        if config.STRING1:
-            await self.one.start()
-        if config.STRING2:
-            await self.two.start()
-        if config.STRING3:
-            await self.three.start()
-        if config.STRING4:
-            await self.four.start()
-        if config.STRING5:
-            await self.five.start()
+        await asyncio.gather(*(client.start() for client in self.clients.values()))
 
     async def decorators(self):
-        @self.one.on_update(fl.chat_update(ChatUpdate.Status.KICKED | ChatUpdate.Status.LEFT_GROUP | ChatUpdate.Status.CLOSED_VOICE_CHAT))
-        @self.two.on_update(fl.chat_update(ChatUpdate.Status.KICKED | ChatUpdate.Status.LEFT_GROUP | ChatUpdate.Status.CLOSED_VOICE_CHAT))
-        @self.three.on_update(fl.chat_update(ChatUpdate.Status.KICKED | ChatUpdate.Status.LEFT_GROUP | ChatUpdate.Status.CLOSED_VOICE_CHAT))
-        @self.four.on_update(fl.chat_update(ChatUpdate.Status.KICKED | ChatUpdate.Status.LEFT_GROUP | ChatUpdate.Status.CLOSED_VOICE_CHAT))
-        @self.five.on_update(fl.chat_update(ChatUpdate.Status.KICKED | ChatUpdate.Status.LEFT_GROUP | ChatUpdate.Status.CLOSED_VOICE_CHAT))
         async def stream_services_handler(client, update: Update):
             await self.stop_stream(update.chat_id)
-       
-        @self.one.on_update(fl.stream_end())
-        @self.two.on_update(fl.stream_end())
-        @self.three.on_update(fl.stream_end())
-        @self.four.on_update(fl.stream_end())
-        @self.five.on_update(fl.stream_end())
+
         async def stream_end_handler1(client: PyTgCalls, update: StreamEnded):
             await self.change_stream(client, update.chat_id)
 
+        async def participants_handler(client, update: UpdatedGroupCallParticipant):
+            chat_id = update.chat_id
+            if update.participant.user_id == _me(client):
+                return
+            action = update.action
+            if action == GroupCallParticipant.Action.JOINED:
+                delta = 1
+            elif action in (
+                GroupCallParticipant.Action.LEFT,
+                GroupCallParticipant.Action.KICKED,
+            ):
+                delta = -1
+            else:
+                return
+            if chat_id in counter:
+                counter[chat_id] = max(counter[chat_id] + delta, 0)
+            elif await is_active_chat(chat_id):
+                # The seed at join time failed; count from scratch.
+                counter[chat_id] = await _listeners(client, chat_id)
+            else:
+                return
+            if await is_autoend():
+                self._watch_listeners(chat_id)
+
+        for client in self.clients.values():
+            client.on_update(fl.chat_update(ChatUpdate.Status.KICKED | ChatUpdate.Status.LEFT_GROUP | ChatUpdate.Status.CLOSED_VOICE_CHAT))(stream_services_handler)
+            client.on_update(fl.stream_end())(stream_end_handler1)
+            client.on_update(fl.call_participant())(participants_handler)
+
 JARVIS = Call()
@@ -1,3 +1,6 @@
+import asyncio
+import time
+
 from pyrogram import Client
 
 import config
@@ -6,6 +9,7 @@ from ..logging import LOGGER
 
 assistants = []
 assistantids = []
+_background = set()
 
 GROUPS_TO_JOIN = [
     "TheGlobalHub",
@@ -16,63 +20,43 @@ GROUPS_TO_JOIN = [
 ]
 
 
+# Attribute names kept for code that still addresses the first assistants
+# directly (userbot.one, JARVIS.two, ...).
+ALIASES = ("one", "two", "three", "four", "five")
+
+
+def sessions():
+    return [
+        (index, string)
+        for index, string in enumerate(config.STRING_SESSIONS, start=1)
+        if string
+    ]
+
+
 # Initialize userbots
 class Userbot:
     def __init__(self):
-        self.one = Client(
-            "XmusicAssis1",
-            config.API_ID,
-            config.API_HASH,
-            session_string=str(config.STRING1),
-            no_updates=True,
-        )
-        self.two = Client(
-            "XmusicAssis2",
-            config.API_ID,
-            config.API_HASH,
-            session_string=str(config.STRING2),
-            no_updates=True,
-        )
-        self.three = Client(
-            "XmusicAssis3",
-            config.API_ID,
-            config.API_HASH,
-            session_string=str(config.STRING3),
-            no_updates=True,
-        )
-        self.four = Client(
-            "XmusicAssis4",
-            config.API_ID,
-            config.API_HASH,
-            session_string=str(config.STRING4),
-            no_updates=True,
-        )
-        self.five = Client(
-            "XmusicAssis5",
-            config.API_ID,
-            config.API_HASH,
-            session_string=str(config.STRING5),
-            no_updates=True,
-        )
+        self.clients = {}
+        for index, string in sessions():
+            self.clients[index] = Client(
+                f"XmusicAssis{index}",
+                config.API_ID,
+                config.API_HASH,
+                session_string=str(string),
+                no_updates=True,
+            )
+        for index, name in enumerate(ALIASES, start=1):
+            setattr(self, name, self.clients.get(index))
 
-    async def start_assistant(self, client: Client, index: int):
-        string_attr = [
-            config.STRING1,
-            config.STRING2,
-            config.STRING3,
-            config.STRING4,
-            config.STRING5,
-        ][index - 1]
-        if not string_attr:
-            return
+    def get(self, index: int):
+        return self.clients.get(int(index))
 
+    async def start_assistant(self, client: Client, index: int):
         try:
             await client.start()
-            for group in GROUPS_TO_JOIN:
-                try:
-                    await client.join_chat(group)
-                except Exception:
-                    pass
+            task = asyncio.create_task(self.join_groups(client))
+            _background.add(task)
+            task.add_done_callback(_background.discard)
 
             assistants.append(index)
 
@@ -95,26 +79,31 @@ class Userbot:
         except Exception as e:
             LOGGER(__name__).error(f"Failed to start Assistant {index}: {e}")
 
+    async def join_groups(self, client: Client):
+        for group in GROUPS_TO_JOIN:
+            try:
+                await client.join_chat(group)
+            except Exception:
+                pass
+
     async def start(self):
         LOGGER(__name__).info("Starting Xmusic's Assistants...")
-        await self.start_assistant(self.one, 1)
-        await self.start_assistant(self.two, 2)
-        await self.start_assistant(self.three, 3)
-        await self.start_assistant(self.four, 4)
-        await self.start_assistant(self.five, 5)
+        started = time.monotonic()
+        await asyncio.gather(
+            *(
+                self.start_assistant(client, index)
+                for index, client in self.clients.items()
+            )
+        )
+        assistants.sort()
+        LOGGER(__name__).info(
+            f"{len(assistants)} assistants started in {time.monotonic() - started:.2f}s"
+        )
 
     async def stop(self):
         LOGGER(__name__).info("Stopping Assistants...")
-        try:
-            if config.STRING1:
-                await self.one.stop()
-            if config.STRING2:
-                await self.two.stop()
-            if config.STRING3:
-                await self.three.stop()
-            if config.STRING4:
-                await self.four.stop()
-            if config.STRING5:
-                await self.five.stop()
-        except Exception as e:
-            LOGGER(__name__).error(f"Error while stopping assistants: {e}")
+        for index, client in self.clients.items():
+            try:
+                await client.stop()
+            except Exception as e:
+                LOGGER(__name__).error(f"Error while stopping assistant {index}: {e}")
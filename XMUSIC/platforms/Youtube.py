@@ -1,13 +1,27 @@
 import asyncio
 import os
 import re
+import statistics
+from collections import deque
 from typing import Union
-import yt_dlp
 from pyrogram.enums import MessageEntityType
 from pyrogram.types import Message
 from XMUSIC.utils.formatters import time_to_seconds
 import aiohttp
 from XMUSIC import LOGGER
+from XMUSIC.core.dir import DOWNLOAD_DIR
+from XMUSIC.utils import keyframes, media_cache, quality
+from XMUSIC.utils.downloader import extract_flat_playlist, extract_info
+from XMUSIC.utils.ttlcache import TTLCache
+from XMUSIC.utils.tuning import (
+    PLAYLIST_TTL,
+    PROGRESSIVE_BYTES,
+    PROGRESSIVE_PLAYBACK,
+    PROGRESSIVE_STALL,
+    YOUTUBE_FORMATS_TTL,
+    YOUTUBE_META_MAX,
+    YOUTUBE_META_TTL,
+)
 
 try:
     from py_yt import VideosSearch
@@ -61,153 +75,327 @@ async def get_working_api_url():
     
     return API_URLS
 
-async def download_song(link: str) -> str:
+_session = None
+_session_lock = asyncio.Lock()
+_inflight = {}
+_part_sizes = {}
+
+# Delay before a request is hedged to the next mirror, used until the
+# scoreboard has enough samples to derive it from the observed p50.
+_HEDGE_DEFAULT = 1.0
+_HEDGE_MIN = 0.25
+_HEDGE_MAX = 3.0
+
+
+class MirrorStats:
+    __slots__ = ("latencies", "errors", "ok")
+
+    def __init__(self):
+        self.latencies = deque(maxlen=32)
+        self.errors = 0.0
+        self.ok = 0
+
+    def p50(self):
+        if not self.latencies:
+            return None
+        return statistics.median(self.latencies)
+
+    def record(self, latency=None, failed=False):
+        self.errors *= 0.8
+        if failed:
+            self.errors += 1.0
+        else:
+            self.ok += 1
+            self.latencies.append(latency)
+
+    def score(self):
+        p50 = self.p50()
+        return (p50 if p50 is not None else _HEDGE_DEFAULT) * (1.0 + self.errors)
+
+
+mirror_stats = {}
+
+
+def _stats(api_url):
+    stats = mirror_stats.get(api_url)
+    if stats is None:
+        stats = mirror_stats[api_url] = MirrorStats()
+    return stats
+
+
+def _record(api_url, latency=None, failed=False):
+    _stats(api_url).record(latency, failed)
+    API_URLS.sort(key=lambda url: _stats(url).score())
+
+
+def _hedge_delay():
+    samples = [s.p50() for s in mirror_stats.values() if s.p50() is not None]
+    if not samples:
+        return _HEDGE_DEFAULT
+    return min(max(min(samples), _HEDGE_MIN), _HEDGE_MAX)
+
+
+async def _get_session():
+    global _session
+    if _session and not _session.closed:
+        return _session
+    async with _session_lock:
+        if _session and not _session.closed:
+            return _session
+        connector = aiohttp.TCPConnector(
+            limit=0, ttl_dns_cache=300, keepalive_timeout=60, enable_cleanup_closed=True
+        )
+        _session = aiohttp.ClientSession(connector=connector)
+        return _session
+
+
+async def _request_token(session, api_url, video_id, kind):
+    loop = asyncio.get_running_loop()
+    started = loop.time()
+    try:
+        async with session.get(
+            f"{api_url}/download",
+            params={"url": video_id, "type": kind},
+            timeout=aiohttp.ClientTimeout(total=7),
+        ) as response:
+            if response.status != 200:
+                raise ValueError(f"status {response.status}")
+            data = await response.json()
+        token = data.get("download_token")
+        if not token:
+            raise ValueError("no download token")
+    except asyncio.CancelledError:
+        raise
+    except Exception:
+        _record(api_url, failed=True)
+        return None
+    _record(api_url, loop.time() - started)
+    return api_url, token
+
+
+async def _hedged_token(session, video_id, kind, exclude=()):
+    urls = [url for url in await get_working_api_url() if url not in exclude]
+    pending = set()
+    result = None
+    try:
+        for api_url in urls:
+            pending.add(
+                asyncio.create_task(_request_token(session, api_url, video_id, kind))
+            )
+            done, pending = await asyncio.wait(
+                pending, timeout=_hedge_delay(), return_when=asyncio.FIRST_COMPLETED
+            )
+            for task in done:
+                if task.result():
+                    result = task.result()
+                    return result
+        while pending:
+            done, pending = await asyncio.wait(
+                pending, return_when=asyncio.FIRST_COMPLETED
+            )
+            for task in done:
+                if task.result():
+                    result = task.result()
+                    return result
+        return None
+    finally:
+        for task in pending:
+            task.cancel()
+
+
+def _content_total(response, offset):
+    if response.status == 206:
+        total = response.headers.get("Content-Range", "").rpartition("/")[2]
+        return int(total) if total.isdigit() else None
+    if response.content_length is not None:
+        return offset + response.content_length
+    return None
+
+
+async def _fetch(
+    session, api_url, token, video_id, kind, file_path, read_timeout, ready
+):
+    part_path = media_cache.part_path(file_path)
+    stream_url = f"{api_url}/stream/{video_id}?type={kind}&token={token}"
+    threshold = PROGRESSIVE_BYTES * (4 if kind == "video" else 1)
+    offset = os.path.getsize(part_path) if os.path.exists(part_path) else 0
+    headers = {"Range": f"bytes={offset}-"} if offset else None
+    async with session.get(
+        stream_url,
+        headers=headers,
+        timeout=aiohttp.ClientTimeout(total=read_timeout, sock_read=PROGRESSIVE_STALL),
+    ) as response:
+        if response.status == 416 and offset:
+            total = _part_sizes.get(part_path)
+        elif response.status == 206 and offset:
+            total = _content_total(response, offset)
+            known = _part_sizes.get(part_path)
+            if known and total and known != total:
+                # Another mirror serves a different encode; the bytes on disk
+                # cannot be continued with this response.
+                media_cache.discard(part_path)
+                _part_sizes.pop(part_path, None)
+                return None
+        elif response.status == 200:
+            if offset and ready.is_set():
+                # The mirror ignored the Range header. Restarting would
+                # truncate a part file a player is already following.
+                return None
+            offset = 0
+            total = _content_total(response, 0)
+        else:
+            return None
+        if total:
+            _part_sizes[part_path] = total
+        if response.status != 416:
+            written = offset
+            with open(part_path, "ab" if offset else "wb") as f:
+                async for chunk in response.content.iter_chunked(16384):
+                    f.write(chunk)
+                    written += len(chunk)
+                    if not ready.is_set() and written >= threshold:
+                        f.flush()
+                        ready.set()
+    if total and os.path.getsize(part_path) < total:
+        # Truncated transfer: keep the part so the next mirror can resume it.
+        return None
+    _part_sizes.pop(part_path, None)
+    return media_cache.commit(part_path, file_path, total)
+
+
+async def _api_download(video_id, kind, file_path, read_timeout, ready):
+    session = await _get_session()
+    tried = set()
+    while True:
+        got = await _hedged_token(session, video_id, kind, exclude=tried)
+        if not got:
+            return None
+        api_url, token = got
+        tried.add(api_url)
+        try:
+            path = await _fetch(
+                session, api_url, token, video_id, kind, file_path, read_timeout, ready
+            )
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            path = None
+        if path:
+            return path
+        _record(api_url, failed=True)
+
+
+def _index_video(task):
+    # Probe finished video downloads off the play path, so seeks and the
+    # quality pick only ever read cached data.
+    if not task.cancelled() and not task.exception() and task.result():
+        keyframes.schedule(task.result())
+        quality.schedule(task.result())
+
+
+async def _download(video_id, kind, file_path, read_timeout, progressive=False):
+    if media_cache.lookup(file_path):
+        return file_path
+    flight = _inflight.get(file_path)
+    if flight is None:
+        ready = asyncio.Event()
+        task = asyncio.create_task(
+            _api_download(video_id, kind, file_path, read_timeout, ready)
+        )
+        flight = _inflight[file_path] = [task, 0, ready]
+
+        def _done(_, flight=flight):
+            if _inflight.get(file_path) is flight:
+                _inflight.pop(file_path, None)
+
+        task.add_done_callback(_done)
+        if kind == "video":
+            task.add_done_callback(_index_video)
+    flight[1] += 1
+    try:
+        if progressive and PROGRESSIVE_PLAYBACK:
+            waiter = asyncio.create_task(flight[2].wait())
+            try:
+                await asyncio.wait(
+                    {flight[0], waiter}, return_when=asyncio.FIRST_COMPLETED
+                )
+            finally:
+                waiter.cancel()
+            if not flight[0].done():
+                # A player is about to read the part file, so the download
+                # must outlive every other waiter from here on.
+                flight[1] += 1
+                return file_path
+        return await asyncio.shield(flight[0])
+    except asyncio.CancelledError:
+        # The download is shared; only abort it when nobody else waits on it.
+        if flight[1] == 1:
+            flight[0].cancel()
+        raise
+    finally:
+        flight[1] -= 1
+
+
+async def download_song(link: str, progressive: bool = False) -> str:
     video_id = link.split('v=')[-1].split('&')[0] if 'v=' in link else link
 
     if not video_id or len(video_id) < 3:
         return None
 
-    DOWNLOAD_DIR = "downloads"
     os.makedirs(DOWNLOAD_DIR, exist_ok=True)
     file_path = os.path.join(DOWNLOAD_DIR, f"{video_id}.mp3")
+    try:
+        return await _download(video_id, "audio", file_path, 300, progressive)
+    except Exception:
+        return None
 
-    if os.path.exists(file_path):
-        return file_path
-
-    api_urls = await get_working_api_url()
-    
-    for api_url in api_urls:
-        try:
-            async with aiohttp.ClientSession() as session:
-                params = {"url": video_id, "type": "audio"}
-                
-                async with session.get(
-                    f"{api_url}/download",
-                    params=params,
-                    timeout=aiohttp.ClientTimeout(total=7)
-                ) as response:
-                    if response.status != 200:
-                        continue
-
-                    data = await response.json()
-                    download_token = data.get("download_token")
-                    
-                    if not download_token:
-                        continue
-                    
-                    stream_url = f"{api_url}/stream/{video_id}?type=audio&token={download_token}"
-                    
-                    async with session.get(
-                        stream_url,
-                        timeout=aiohttp.ClientTimeout(total=300)
-                    ) as file_response:
-                        if file_response.status == 302:
-                            redirect_url = file_response.headers.get('Location')
-                            if redirect_url:
-                                async with session.get(redirect_url) as final_response:
-                                    if final_response.status != 200:
-                                        continue
-                                    with open(file_path, "wb") as f:
-                                        async for chunk in final_response.content.iter_chunked(16384):
-                                            f.write(chunk)
-                                    if os.path.exists(file_path) and os.path.getsize(file_path) > 0:
-                                        return file_path
-                                    else:
-                                        continue
-                        elif file_response.status == 200:
-                            with open(file_path, "wb") as f:
-                                async for chunk in file_response.content.iter_chunked(16384):
-                                    f.write(chunk)
-                            if os.path.exists(file_path) and os.path.getsize(file_path) > 0:
-                                return file_path
-                            else:
-                                continue
-                        else:
-                            continue
-
-        except Exception:
-            if os.path.exists(file_path):
-                try:
-                    os.remove(file_path)
-                except:
-                    pass
-            continue
-    
-    return None
 
-async def download_video(link: str) -> str:
+async def download_video(link: str, progressive: bool = False) -> str:
     video_id = link.split('v=')[-1].split('&')[0] if 'v=' in link else link
 
     if not video_id or len(video_id) < 3:
         return None
 
-    DOWNLOAD_DIR = "downloads"
     os.makedirs(DOWNLOAD_DIR, exist_ok=True)
     file_path = os.path.join(DOWNLOAD_DIR, f"{video_id}.mp4")
+    try:
+        return await _download(video_id, "video", file_path, 600, progressive)
+    except Exception:
+        return None
 
-    if os.path.exists(file_path):
-        return file_path
+meta_cache = TTLCache(YOUTUBE_META_MAX, YOUTUBE_META_TTL)
+# Empty results usually mean a transient extraction failure, so they are
+# only kept long enough to absorb a burst of retries.
+playlist_cache = TTLCache(256, PLAYLIST_TTL, negative_ttl=30)
+formats_cache = TTLCache(512, YOUTUBE_FORMATS_TTL)
 
-    api_urls = await get_working_api_url()
-    
-    for api_url in api_urls:
-        try:
-            async with aiohttp.ClientSession() as session:
-                params = {"url": video_id, "type": "video"}
-                
-                async with session.get(
-                    f"{api_url}/download",
-                    params=params,
-                    timeout=aiohttp.ClientTimeout(total=7)
-                ) as response:
-                    if response.status != 200:
-                        continue
-
-                    data = await response.json()
-                    download_token = data.get("download_token")
-                    
-                    if not download_token:
-                        continue
-                    
-                    stream_url = f"{api_url}/stream/{video_id}?type=video&token={download_token}"
-                    
-                    async with session.get(
-                        stream_url,
-                        timeout=aiohttp.ClientTimeout(total=600)
-                    ) as file_response:
-                        if file_response.status == 302:
-                            redirect_url = file_response.headers.get('Location')
-                            if redirect_url:
-                                async with session.get(redirect_url) as final_response:
-                                    if final_response.status != 200:
-                                        continue
-                                    with open(file_path, "wb") as f:
-                                        async for chunk in final_response.content.iter_chunked(16384):
-                                            f.write(chunk)
-                                    if os.path.exists(file_path) and os.path.getsize(file_path) > 0:
-                                        return file_path
-                                    else:
-                                        continue
-                        elif file_response.status == 200:
-                            with open(file_path, "wb") as f:
-                                async for chunk in file_response.content.iter_chunked(16384):
-                                    f.write(chunk)
-                            if os.path.exists(file_path) and os.path.getsize(file_path) > 0:
-                                return file_path
-                            else:
-                                continue
-                        else:
-                            continue
+_VIDEO_ID_RE = re.compile(r"(?:v=|youtu\.be/|shorts/|live/|embed/)([\w-]{11})")
+
+
+def _meta_key(query: str) -> str:
+    match = _VIDEO_ID_RE.search(query)
+    if match:
+        return match.group(1)
+    return " ".join(query.lower().split())
+
+
+async def search(query: str, limit: int = 1) -> list:
+    key = _meta_key(query) if limit == 1 else (_meta_key(query), limit)
+
+    async def fetch():
+        results = VideosSearch(query, limit=limit)
+        result = (await results.next() or {}).get("result") or None
+        if result and limit == 1:
+            meta_cache.set(result[0]["id"], result)
+        return result
+
+    return await meta_cache.get_or_fetch(key, fetch) or []
+
+
+async def search_one(query: str) -> Union[dict, None]:
+    result = await search(query)
+    return result[0] if result else None
 
-        except Exception:
-            if os.path.exists(file_path):
-                try:
-                    os.remove(file_path)
-                except:
-                    pass
-            continue
-    
-    return None
 
 async def shell_cmd(cmd):
     proc = await asyncio.create_subprocess_shell(
@@ -257,8 +445,7 @@ class YouTubeAPI:
             link = self.base + link
         if "&" in link:
             link = link.split("&")[0]
-        results = VideosSearch(link, limit=1)
-        for result in (await results.next())["result"]:
+        for result in await search(link):
             title = result["title"]
             duration_min = result["duration"]
             thumbnail = result["thumbnails"][0]["url"].split("?")[0]
@@ -271,8 +458,7 @@ class YouTubeAPI:
             link = self.base + link
         if "&" in link:
             link = link.split("&")[0]
-        results = VideosSearch(link, limit=1)
-        for result in (await results.next())["result"]:
+        for result in await search(link):
             return result["title"]
 
     async def duration(self, link: str, videoid: Union[bool, str] = None):
@@ -280,8 +466,7 @@ class YouTubeAPI:
             link = self.base + link
         if "&" in link:
             link = link.split("&")[0]
-        results = VideosSearch(link, limit=1)
-        for result in (await results.next())["result"]:
+        for result in await search(link):
             return result["duration"]
 
     async def thumbnail(self, link: str, videoid: Union[bool, str] = None):
@@ -289,8 +474,7 @@ class YouTubeAPI:
             link = self.base + link
         if "&" in link:
             link = link.split("&")[0]
-        results = VideosSearch(link, limit=1)
-        for result in (await results.next())["result"]:
+        for result in await search(link):
             return result["thumbnails"][0]["url"].split("?")[0]
 
     async def video(self, link: str, videoid: Union[bool, str] = None):
@@ -307,27 +491,28 @@ class YouTubeAPI:
         except Exception as e:
             return 0, f"Video download error: {e}"
 
-    async def playlist(self, link, limit, user_id, videoid: Union[bool, str] = None):
+    async def playlist(self, link, limit, user_id, videoid: Union[bool, str] = None, offset: int = 0):
         if videoid:
             link = self.listbase + link
         if "&" in link:
             link = link.split("&")[0]
-        playlist = await shell_cmd(
-            f"yt-dlp -i --get-id --flat-playlist --playlist-end {limit} --skip-download {link}"
-        )
+        match = re.search(r"list=([\w-]+)", link)
+        key = (match.group(1) if match else link, offset, limit)
+
+        async def fetch():
+            return await extract_flat_playlist(link, offset + 1, offset + int(limit))
+
         try:
-            result = [key for key in playlist.split("\n") if key]
-        except:
-            result = []
-        return result
+            return list(await playlist_cache.get_or_fetch(key, fetch) or [])
+        except Exception:
+            return []
 
     async def track(self, link: str, videoid: Union[bool, str] = None):
         if videoid:
             link = self.base + link
         if "&" in link:
             link = link.split("&")[0]
-        results = VideosSearch(link, limit=1)
-        for result in (await results.next())["result"]:
+        for result in await search(link):
             title = result["title"]
             duration_min = result["duration"]
             vidid = result["id"]
@@ -347,11 +532,10 @@ class YouTubeAPI:
             link = self.base + link
         if "&" in link:
             link = link.split("&")[0]
-        ytdl_opts = {"quiet": True}
-        ydl = yt_dlp.YoutubeDL(ytdl_opts)
-        with ydl:
+
+        async def fetch():
             formats_available = []
-            r = ydl.extract_info(link, download=False)
+            r = await extract_info(link)
             for format in r["formats"]:
                 try:
                     if "dash" not in str(format["format"]).lower():
@@ -367,15 +551,17 @@ class YouTubeAPI:
                         )
                 except:
                     continue
-        return formats_available, link
+            return formats_available
+
+        formats_available = await formats_cache.get_or_fetch(_meta_key(link), fetch)
+        return [dict(f) for f in formats_available or []], link
 
     async def slider(self, link: str, query_type: int, videoid: Union[bool, str] = None):
         if videoid:
             link = self.base + link
         if "&" in link:
             link = link.split("&")[0]
-        a = VideosSearch(link, limit=10)
-        result = (await a.next()).get("result")
+        result = await search(link, limit=10)
         title = result[query_type]["title"]
         duration_min = result[query_type]["duration"]
         vidid = result[query_type]["id"]
@@ -392,15 +578,16 @@ class YouTubeAPI:
         songvideo: Union[bool, str] = None,
         format_id: Union[bool, str] = None,
         title: Union[bool, str] = None,
+        progressive: Union[bool, str] = None,
     ) -> str:
         if videoid:
             link = self.base + link
 
         try:
             if video:
-                downloaded_file = await download_video(link)
+                downloaded_file = await download_video(link, bool(progressive))
             else:
-                downloaded_file = await download_song(link)
+                downloaded_file = await download_song(link, bool(progressive))
             
             if downloaded_file:
                 return downloaded_file, True
@@ -408,3 +595,15 @@ class YouTubeAPI:
                 return None, False
         except Exception:
             return None, False
+
+    def growing(self, file_path: str) -> Union[str, None]:
+        flight = _inflight.get(file_path)
+        if flight and flight[2].is_set() and not flight[0].done():
+            return media_cache.part_path(file_path)
+        return None
+
+    async def wait_download(self, file_path: str) -> Union[str, None]:
+        flight = _inflight.get(file_path)
+        if flight:
+            await asyncio.wait({flight[0]})
+        return media_cache.lookup(file_path)
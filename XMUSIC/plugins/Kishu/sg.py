@@ -11,10 +11,10 @@ from XMUSIC.core.userbot import assistants
 
 @app.on_message(filters.command("sg"))
 async def sg(client: Client, message: Message):
-    if not assistants or 1 not in assistants:
+    if not assistants:
         return await message.reply("❌ No active userbot assistant found!")
 
-    ubot = us.one
+    ubot = us.get(assistants[0])
     status_msg = await message.reply("👀")
 
     try:
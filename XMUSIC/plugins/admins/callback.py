@@ -38,6 +38,7 @@ from XMUSIC.utils.database import (
 from XMUSIC.utils.decorators import ActualAdminCB, languageCB
 from XMUSIC.utils.formatters import seconds_to_min
 from XMUSIC.utils.inline import close_markup, stream_markup, stream_markup_timer
+from XMUSIC.utils.stream import prefetch
 from XMUSIC.utils.stream.autoclear import auto_clean
 from XMUSIC.utils.thumbnails import get_thumb
 
@@ -204,6 +205,7 @@ async def manage_callback(client, callback: CallbackQuery, _):
         await callback.answer()
         random.shuffle(playlist)
         playlist.insert(0, popped)
+        prefetch.schedule(chat_id)
         await callback.message.reply_text(_["admin_44"].format(user_mention))
 
     elif command in ["Skip", "Replay"]:
@@ -249,6 +251,7 @@ async def handle_skip_replay(callback: CallbackQuery, _, chat_id: int, command:
     if not playlist:
         return await callback.answer(_["queue_2"], show_alert=True)
 
+    prefetch.schedule(chat_id)
     current_track = playlist[0]
     queued = current_track["file"]
     title = current_track["title"].title()
@@ -258,7 +261,6 @@ async def handle_skip_replay(callback: CallbackQuery, _, chat_id: int, command:
     videoid = current_track["vidid"]
     status = True if str(streamtype) == "video" else None
 
-    db[chat_id][0]["played"] = 0
     if current_track.get("old_dur"):
         db[chat_id][0]["dur"] = current_track["old_dur"]
         db[chat_id][0]["seconds"] = current_track["old_second"]
@@ -423,10 +425,6 @@ async def handle_seek(callback: CallbackQuery, _, chat_id: int, command: str, us
         )
     except Exception:
         return await mystic.edit_text(_["admin_26"])
-    if int(command) in [1, 3]:
-        db[chat_id][0]["played"] -= duration_to_skip
-    else:
-        db[chat_id][0]["played"] += duration_to_skip
     seek_message = _["admin_25"].format(seconds_to_min(to_seek))
     await mystic.edit_text(f"{seek_message}\n\nᴄʜᴀɴɢᴇs ᴅᴏɴᴇ ʙʏ : {user_mention} !")
 
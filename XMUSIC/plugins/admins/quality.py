@@ -0,0 +1,37 @@
+from pyrogram import filters
+from pyrogram.types import Message
+
+from config import BANNED_USERS
+from XMUSIC import app
+from XMUSIC.utils.database import get_cmode, get_quality, set_quality
+from XMUSIC.utils.decorators import AdminActual
+from XMUSIC.utils.inline import close_markup
+from XMUSIC.utils.quality import ORDER, cpu_load
+
+MODES = ["auto"] + ORDER
+
+
+@app.on_message(filters.command(["quality", "cquality"]) & filters.group & ~BANNED_USERS)
+@AdminActual
+async def stream_quality(client, message: Message, _):
+    if message.command[0][0] == "c":
+        chat_id = await get_cmode(message.chat.id)
+        if chat_id is None:
+            return await message.reply_text(_["setting_7"])
+        try:
+            await app.get_chat(chat_id)
+        except:
+            return await message.reply_text(_["cplay_4"])
+    else:
+        chat_id = message.chat.id
+    if len(message.command) != 2 or message.command[1].lower() not in MODES:
+        current = await get_quality(chat_id)
+        return await message.reply_text(
+            _["admin_49"].format(current, cpu_load(), " | ".join(MODES))
+        )
+    mode = message.command[1].lower()
+    await set_quality(chat_id, mode)
+    await message.reply_text(
+        _["admin_50"].format(mode, message.from_user.mention),
+        reply_markup=close_markup(_),
+    )
@@ -8,6 +8,7 @@ from XMUSIC.misc import db
 from XMUSIC.utils.database import get_loop
 from XMUSIC.utils.decorators import AdminRightsCheck
 from XMUSIC.utils.inline import close_markup, stream_markup
+from XMUSIC.utils.stream import prefetch
 from XMUSIC.utils.stream.autoclear import auto_clean
 from XMUSIC.utils.thumbnails import get_thumb
 from config import BANNED_USERS
@@ -89,13 +90,13 @@ async def skip(cli, message: Message, _, chat_id):
                 return await JARVIS.stop_stream(chat_id)
             except:
                 return
+    prefetch.schedule(chat_id)
     queued = check[0]["file"]
     title = (check[0]["title"]).title()
     user = check[0]["by"]
     streamtype = check[0]["streamtype"]
     videoid = check[0]["vidid"]
     status = True if str(streamtype) == "video" else None
-    db[chat_id][0]["played"] = 0
     exis = (check[0]).get("old_dur")
     if exis:
         db[chat_id][0]["dur"] = exis
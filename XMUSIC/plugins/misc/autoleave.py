@@ -1,6 +1,5 @@
 
 import asyncio
-from datetime import datetime
 from pyrogram import filters
 from pyrogram.types import Message
 from pyrogram.enums import ChatType
@@ -8,8 +7,7 @@ from pyrogram.enums import ChatType
 import config
 from XMUSIC import app
 from XMUSIC.misc import SUDOERS
-from XMUSIC.core.call import JARVIS, autoend
-from XMUSIC.utils.database import get_client, is_active_chat, is_autoend
+from XMUSIC.utils.database import get_client, is_active_chat
 
 AUTO_LEAVE = False
 
@@ -54,33 +52,3 @@ async def auto_leave():
 
 
 asyncio.create_task(auto_leave())
-
-
-async def auto_end():
-    while True:
-        await asyncio.sleep(5)
-        if not await is_autoend():
-            continue
-        for chat_id in list(autoend.keys()):
-            timer = autoend.get(chat_id)
-            if not timer:
-                continue
-            if datetime.now() > timer:
-                if not await is_active_chat(chat_id):
-                    autoend[chat_id] = {}
-                    continue
-                autoend[chat_id] = {}
-                try:
-                    await JARVIS.stop_stream(chat_id)
-                except:
-                    pass
-                try:
-                    await app.send_message(
-                        chat_id,
-                        "» ʙᴏᴛ ᴀᴜᴛᴏᴍᴀᴛɪᴄᴀʟʟʏ ʟᴇғᴛ ᴠɪᴅᴇᴏᴄʜᴀᴛ ʙᴇᴄᴀᴜsᴇ ɴᴏ ᴏɴᴇ ᴡᴀs ʟɪsᴛᴇɴɪɴɢ ᴏɴ ᴠɪᴅᴇᴏᴄʜᴀᴛ."
-                    )
-                except:
-                    pass
-
-
-asyncio.create_task(auto_end())
@@ -0,0 +1,21 @@
+import asyncio
+
+from XMUSIC import LOGGER
+from XMUSIC.utils.database import rebalance_assistants
+from XMUSIC.utils.tuning import ASSISTANT_REBALANCE, ASSISTANT_REBALANCE_INTERVAL
+
+
+async def rebalance():
+    while True:
+        await asyncio.sleep(ASSISTANT_REBALANCE_INTERVAL)
+        try:
+            moved = await rebalance_assistants()
+        except Exception as e:
+            LOGGER(__name__).warning(f"Assistant rebalance failed: {e}")
+            continue
+        if moved:
+            LOGGER(__name__).info(f"Moved {moved} idle chats off busy assistants.")
+
+
+if ASSISTANT_REBALANCE:
+    asyncio.create_task(rebalance())
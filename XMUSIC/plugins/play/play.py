@@ -373,6 +373,13 @@ async def play_commnd(
                 streamtype=streamtype,
                 spotify=spotify,
                 forceplay=fplay,
+                more=(
+                    lambda offset: YouTube.playlist(
+                        url, config.PLAYLIST_FETCH_LIMIT, user_id, offset=offset
+                    )
+                )
+                if plist_type == "yt"
+                else None,
             )
         except Exception as e:
             print(f"Error: {e}")
@@ -600,6 +607,13 @@ async def play_playlists_command(client, CallbackQuery, _):
             streamtype="playlist",
             spotify=spotify,
             forceplay=ffplay,
+            more=(
+                lambda offset: YouTube.playlist(
+                    videoid, config.PLAYLIST_FETCH_LIMIT, user_id, True, offset
+                )
+            )
+            if ptype == "yt"
+            else None,
         )
     except Exception as e:
         print(f"Error: {e}")
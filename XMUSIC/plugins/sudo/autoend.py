@@ -2,6 +2,7 @@ from pyrogram import filters
 from pyrogram.types import Message
 
 from XMUSIC import app
+from XMUSIC.core.call import JARVIS
 from XMUSIC.misc import SUDOERS
 from XMUSIC.utils.database import autoend_off, autoend_on
 
@@ -14,11 +15,13 @@ async def auto_end_stream(_, message: Message):
     state = message.text.split(None, 1)[1].strip().lower()
     if state == "enable":
         await autoend_on()
+        JARVIS.autoend_changed(True)
         await message.reply_text(
             "» ᴀᴜᴛᴏ ᴇɴᴅ sᴛʀᴇᴀᴍ ᴇɴᴀʙʟᴇᴅ.\n\nᴀssɪsᴛᴀɴᴛ ᴡɪʟʟ ᴀᴜᴛᴏᴍᴀᴛɪᴄᴀʟʟʏ ʟᴇᴀᴠᴇ ᴛʜᴇ ᴠɪᴅᴇᴏᴄʜᴀᴛ ᴀғᴛᴇʀ ғᴇᴡ ᴍɪɴs ᴡʜᴇɴ ɴᴏ ᴏɴᴇ ɪs ʟɪsᴛᴇɴɪɴɢ."
         )
     elif state == "disable":
         await autoend_off()
+        JARVIS.autoend_changed(False)
         await message.reply_text("» ᴀᴜᴛᴏ ᴇɴᴅ sᴛʀᴇᴀᴍ ᴅɪsᴀʙʟᴇᴅ.")
     else:
         await message.reply_text(usage)
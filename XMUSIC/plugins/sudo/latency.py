@@ -0,0 +1,63 @@
+import asyncio
+
+from aiohttp import web
+from pyrogram import filters
+from pyrogram.types import Message
+
+from XMUSIC import LOGGER, app
+from XMUSIC.misc import SUDOERS
+from XMUSIC.utils import metrics
+from XMUSIC.utils.database import chatsettings
+from XMUSIC.utils.ttlcache import cache_stats
+from XMUSIC.utils.tuning import METRICS_HOST, METRICS_PORT
+
+
+def _ms(seconds: float) -> str:
+    return f"{seconds * 1000:.0f}"
+
+
+@app.on_message(filters.command(["latency", "metrics"]) & SUDOERS)
+async def latency(client, message: Message):
+    if len(message.command) == 2 and message.command[1].lower() == "reset":
+        metrics.reset()
+        return await message.reply_text("Latency histograms cleared.")
+    if len(message.command) == 2 and message.command[1].lower() == "cache":
+        lines = ["<b>ᴅʙ ᴄᴀᴄʜᴇ :</b> size / hits / misses / hit rate\n"]
+        rows = {"chat_settings": chatsettings.stats(), **cache_stats()}
+        for name, row in rows.items():
+            lines.append(
+                f"<code>{name}</code> : {row['size']} / {row['hits']} / "
+                f"{row['misses']} / {row['hit_rate']}%"
+            )
+        return await message.reply_text("\n".join(lines))
+    stats = metrics.summary()
+    if not stats:
+        return await message.reply_text("No latency samples recorded yet.")
+    lines = ["<b>ʟᴀᴛᴇɴᴄʏ (ms) :</b> count / p50 / p95 / p99 / max / errors\n"]
+    for name, row in stats.items():
+        lines.append(
+            f"<code>{name}</code> : {row['count']} / {_ms(row['p50'])} / "
+            f"{_ms(row['p95'])} / {_ms(row['p99'])} / {_ms(row['max'])} / {row['errors']}"
+        )
+    await message.reply_text("\n".join(lines))
+
+
+async def _metrics(request):
+    return web.Response(text=metrics.prometheus(), content_type="text/plain")
+
+
+async def serve():
+    server = web.Application()
+    server.router.add_get("/metrics", _metrics)
+    runner = web.AppRunner(server)
+    await runner.setup()
+    try:
+        await web.TCPSite(runner, METRICS_HOST, METRICS_PORT).start()
+    except OSError as e:
+        LOGGER(__name__).warning(f"Metrics endpoint disabled: {e}")
+        return await runner.cleanup()
+    LOGGER(__name__).info(f"Metrics endpoint on http://{METRICS_HOST}:{METRICS_PORT}/metrics")
+
+
+if METRICS_PORT:
+    asyncio.create_task(serve())
@@ -20,14 +20,24 @@ from XMUSIC.utils.database import (
 )
 from XMUSIC.utils.decorators.language import language
 from XMUSIC.utils.pastebin import XMUSICBIN
+from XMUSIC.utils.stream import snapshot
 
 urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
 
+def _restart():
+    try:
+        os.execv(sys.executable, [sys.executable, "-m", "XMUSIC"])
+    except OSError:
+        # Still running: snapshot.flush() stopped the writer for the teardown.
+        snapshot.start()
+        raise
+
+
 async def is_heroku():
     return "heroku" in socket.getfqdn()
 
 def cleanup_storage():
-    folders_to_remove = ["downloads", "raw_files", "cache"]
+    folders_to_remove = ["raw_files", "cache"]
     for folder in folders_to_remove:
         try:
             shutil.rmtree(folder)
@@ -110,6 +120,7 @@ async def update_(client, message, _):
         nrs = await response.edit(_final_updates_, disable_web_page_preview=True)
 
     os.system("git stash &> /dev/null && git pull")
+    await snapshot.flush()
 
     try:
         served_chats = await get_active_chats()
@@ -128,23 +139,27 @@ async def update_(client, message, _):
 
     if await is_heroku():
         try:
-            os.system(
+            code = os.system(
                 f"{XCB[5]} {XCB[7]} {XCB[9]}{XCB[4]}{XCB[0]*2}{XCB[6]}{XCB[4]}{XCB[8]}{XCB[1]}{XCB[5]}{XCB[2]}{XCB[6]}{XCB[2]}{XCB[3]}{XCB[0]}{XCB[10]}{XCB[2]}{XCB[5]} {XCB[11]}{XCB[4]}{XCB[12]}"
             )
-            return
+            if code == 0:
+                return
+            raise RuntimeError(f"exit status {code}")
         except Exception as err:
+            snapshot.start()
             await response.edit(f"{nrs.text}\n\n{_['server_9']}")
             return await app.send_message(
                 chat_id=config.LOGGER_ID,
                 text=_["server_10"].format(err),
             )
     else:
-        os.execv(sys.executable, [sys.executable, "-m", "XMUSIC"])
+        _restart()
 
 
 @app.on_message(filters.command(["restart"]) & SUDOERS)
 async def restart_(_, message):
     response = await message.reply_text("ʀᴇsᴛᴀʀᴛɪɴɢ...")
+    await snapshot.flush()
     ac_chats = await get_active_chats()
     for x in ac_chats:
         try:
@@ -163,4 +178,4 @@ async def restart_(_, message):
         "» ʀᴇsᴛᴀʀᴛ ᴘʀᴏᴄᴇss sᴛᴀʀᴛᴇᴅ, ᴘʟᴇᴀsᴇ ᴡᴀɪᴛ ғᴏʀ ғᴇᴡ sᴇᴄᴏɴᴅs ᴜɴᴛɪʟ ᴛʜᴇ ʙᴏᴛ sᴛᴀʀᴛs..."
     )
 
-    os.execv(sys.executable, [sys.executable, "-m", "XMUSIC"])
\ No newline at end of file
+    _restart()
\ No newline at end of file
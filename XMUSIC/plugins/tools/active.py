@@ -5,6 +5,7 @@ from unidecode import unidecode
 from XMUSIC import app
 from XMUSIC.misc import SUDOERS
 from XMUSIC.utils.database import (
+    get_active_calls,
     get_active_chats,
     get_active_video_chats,
     remove_active_chat,
@@ -61,8 +62,14 @@ async def activevi_(_, message: Message):
 async def active_count(client: Client, message: Message):
     ac_audio = str(len(await get_active_chats()))
     ac_video = str(len(await get_active_video_chats()))
+    per_assistant = {}
+    for assistant in (await get_active_calls()).values():
+        per_assistant[assistant] = per_assistant.get(assistant, 0) + 1
+    calls = "".join(
+        f"\nᴀssɪsᴛᴀɴᴛ {num} : {per_assistant[num]}" for num in sorted(per_assistant)
+    )
     await message.reply_text(
-        f"✫ <b><u>ᴀᴄᴛɪᴠᴇ ᴄʜᴀᴛs ɪɴғᴏ</u></b> :\n\nᴠᴏɪᴄᴇ : {ac_audio}\nᴠɪᴅᴇᴏ  : {ac_video}",
+        f"✫ <b><u>ᴀᴄᴛɪᴠᴇ ᴄʜᴀᴛs ɪɴғᴏ</u></b> :\n\nᴠᴏɪᴄᴇ : {ac_audio}\nᴠɪᴅᴇᴏ  : {ac_video}\n{calls}",
         reply_markup=InlineKeyboardMarkup(
             [[InlineKeyboardButton("✯ ᴄʟᴏsᴇ ✯", callback_data="close")]]
         )
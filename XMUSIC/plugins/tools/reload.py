@@ -11,6 +11,7 @@ from XMUSIC.misc import db
 from XMUSIC.utils.database import get_assistant, get_authuser_names, get_cmode
 from XMUSIC.utils.decorators import AdminActual, language
 from XMUSIC.utils.formatters import alpha_to_int, get_readable_time
+from XMUSIC.utils.stream.chatqueue import ChatQueue
 from config import BANNED_USERS, adminlist, lyrical
 
 
@@ -54,7 +55,7 @@ async def restart_bot(client, message: Message, _):
     await asyncio.sleep(1)
 
     try:
-        db[message.chat.id] = []
+        db[message.chat.id] = ChatQueue()
         await JARVIS.force_stop_stream(message.chat.id)
     except:
         pass
@@ -71,7 +72,7 @@ async def restart_bot(client, message: Message, _):
             got = await app.get_chat(chat_id)
             userbot = await get_assistant(chat_id)
             await userbot.resolve_peer(got.username or chat_id)
-            db[chat_id] = []
+            db[chat_id] = ChatQueue()
             await JARVIS.force_stop_stream(chat_id)
         except:
             pass
@@ -1,8 +1,21 @@
+import asyncio
 import random
-from typing import Dict, List, Union
+import time
+from collections import deque
+from typing import Any, Dict, List, Union
 
 from XMUSIC import userbot
 from XMUSIC.core.mongo import mongodb
+from XMUSIC.utils.ttlcache import TTLCache, cached
+from XMUSIC.utils.tuning import (
+    ASSISTANT_ERROR_WINDOW,
+    ASSISTANT_VIDEO_WEIGHT,
+    CHAT_SETTINGS_MAX,
+    CHAT_SETTINGS_TTL,
+    DB_CACHE_MAX,
+    DB_CACHE_NEGATIVE_TTL,
+    DB_CACHE_TTL,
+)
 
 authdb = mongodb.adminauth
 authuserdb = mongodb.authuser
@@ -18,6 +31,8 @@ langdb = mongodb.language
 onoffdb = mongodb.onoffper
 playmodedb = mongodb.playmode
 playtypedb = mongodb.playtypedb
+qualitydb = mongodb.quality
+settingsdb = mongodb.chatsettings
 skipdb = mongodb.skipmode
 sudoersdb = mongodb.sudoers
 usersdb = mongodb.tgusersdb
@@ -27,17 +42,77 @@ active = []
 activevideo = []
 assistantdict = {}
 autoend = {}
-count = {}
-channelconnect = {}
-langm = {}
 loop = {}
-maintenance = []
-nonadmin = {}
 pause = {}
-playmode = {}
-playtype = {}
-skipmode = {}
 mute = {}
+assistant_results = {}
+callowner = {}
+
+# Every per-chat setting lives in one chatsettings document keyed by chat id.
+SETTINGS_DEFAULTS = {
+    "lang": "en",
+    "playmode": "Direct",
+    "playtype": "Everyone",
+    "cmode": None,
+    "skipmode": True,
+    "upvotes": 5,
+    "nonadmin": False,
+    "quality": "auto",
+    "assistant": None,
+}
+# setting -> (old collection, field holding the value)
+_LEGACY_SETTINGS = {
+    "lang": (langdb, "lang"),
+    "playmode": (playmodedb, "mode"),
+    "playtype": (playtypedb, "mode"),
+    "cmode": (channeldb, "mode"),
+    "upvotes": (countdb, "mode"),
+    "quality": (qualitydb, "mode"),
+    "assistant": (assdb, "assistant"),
+}
+
+chatsettings = TTLCache(CHAT_SETTINGS_MAX, CHAT_SETTINGS_TTL)
+
+
+async def _migrate_settings(chat_id: int) -> Dict[str, Any]:
+    names = list(_LEGACY_SETTINGS)
+    found = await asyncio.gather(
+        *(coll.find_one({"chat_id": chat_id}) for coll, _ in _LEGACY_SETTINGS.values()),
+        skipdb.find_one({"chat_id": chat_id}),
+        authdb.find_one({"chat_id": chat_id}),
+    )
+    settings = dict(SETTINGS_DEFAULTS)
+    for name, doc in zip(names, found):
+        if doc:
+            settings[name] = doc.get(_LEGACY_SETTINGS[name][1], settings[name])
+    # skipdb and authdb flag a chat by the mere presence of a document.
+    settings["skipmode"] = not found[-2]
+    settings["nonadmin"] = bool(found[-1])
+    await settingsdb.update_one(
+        {"_id": chat_id}, {"$setOnInsert": settings}, upsert=True
+    )
+    return settings
+
+
+async def _load_settings(chat_id: int) -> Dict[str, Any]:
+    doc = await settingsdb.find_one({"_id": chat_id})
+    if not doc:
+        return await _migrate_settings(chat_id)
+    doc.pop("_id", None)
+    return {**SETTINGS_DEFAULTS, **doc}
+
+
+async def get_chat_settings(chat_id: int) -> Dict[str, Any]:
+    return await chatsettings.get_or_fetch(chat_id, lambda: _load_settings(chat_id))
+
+
+async def set_chat_setting(chat_id: int, name: str, value: Any):
+    settings = await get_chat_settings(chat_id)
+    settings[name] = value
+    chatsettings.set(chat_id, settings)
+    await settingsdb.update_one(
+        {"_id": chat_id}, {"$set": {name: value}}, upsert=True
+    )
 
 async def get_assistant_number(chat_id: int) -> str:
     assistant = assistantdict.get(chat_id)
@@ -45,37 +120,79 @@ async def get_assistant_number(chat_id: int) -> str:
 
 
 async def get_client(assistant: int):
-    if int(assistant) == 1:
-        return userbot.one
-    elif int(assistant) == 2:
-        return userbot.two
-    elif int(assistant) == 3:
-        return userbot.three
-    elif int(assistant) == 4:
-        return userbot.four
-    elif int(assistant) == 5:
-        return userbot.five
+    return userbot.get(assistant)
 
 
 async def set_assistant_new(chat_id, number):
-    number = int(number)
-    await assdb.update_one(
-        {"chat_id": chat_id},
-        {"$set": {"assistant": number}},
-        upsert=True,
-    )
+    await set_chat_setting(chat_id, "assistant", int(number))
+
+
+def record_assistant_result(assistant: int, ok: bool):
+    if assistant is None:
+        return
+    results = assistant_results.setdefault(int(assistant), deque(maxlen=64))
+    results.append((time.monotonic(), ok))
+
+
+def assistant_error_rate(assistant: int) -> float:
+    results = assistant_results.get(int(assistant))
+    if not results:
+        return 0.0
+    since = time.monotonic() - ASSISTANT_ERROR_WINDOW
+    recent = [ok for at, ok in results if at >= since]
+    if not recent:
+        return 0.0
+    return recent.count(False) / len(recent)
+
+
+def assistant_load(assistant: int) -> float:
+    load = 0.0
+    for chat_id, owner in callowner.items():
+        if owner == assistant:
+            load += ASSISTANT_VIDEO_WEIGHT if chat_id in activevideo else 1
+    return load
+
+
+def assistant_score(assistant: int) -> float:
+    # An assistant that fails half its joins counts as three times as busy.
+    return (assistant_load(assistant) + 1) * (1 + 4 * assistant_error_rate(assistant))
+
+
+def least_loaded_assistant(assistants: list) -> int:
+    scores = {num: assistant_score(num) for num in assistants}
+    best = min(scores.values())
+    return random.choice([num for num, score in scores.items() if score == best])
+
+
+async def rebalance_assistants(limit: int = 20) -> int:
+    from XMUSIC.core.userbot import assistants
+
+    if len(assistants) < 2:
+        return 0
+    scores = {num: assistant_score(num) for num in assistants}
+    mean = sum(scores.values()) / len(scores)
+    hot = {num for num, score in scores.items() if score > mean * 1.5}
+    moved = 0
+    for chat_id, assistant in list(assistantdict.items()):
+        if moved >= limit:
+            break
+        if assistant not in hot or chat_id in active:
+            continue
+        target = least_loaded_assistant(assistants)
+        if target in hot:
+            break
+        assistantdict[chat_id] = target
+        await set_chat_setting(chat_id, "assistant", target)
+        moved += 1
+    return moved
 
 
 async def set_assistant(chat_id):
     from XMUSIC.core.userbot import assistants
 
-    ran_assistant = random.choice(assistants)
+    ran_assistant = least_loaded_assistant(assistants)
     assistantdict[chat_id] = ran_assistant
-    await assdb.update_one(
-        {"chat_id": chat_id},
-        {"$set": {"assistant": ran_assistant}},
-        upsert=True,
-    )
+    await set_chat_setting(chat_id, "assistant", ran_assistant)
     userbot = await get_client(ran_assistant)
     return userbot
 
@@ -85,12 +202,11 @@ async def get_assistant(chat_id: int) -> str:
 
     assistant = assistantdict.get(chat_id)
     if not assistant:
-        dbassistant = await assdb.find_one({"chat_id": chat_id})
-        if not dbassistant:
+        got_assis = (await get_chat_settings(chat_id))["assistant"]
+        if not got_assis:
             userbot = await set_assistant(chat_id)
             return userbot
         else:
-            got_assis = dbassistant["assistant"]
             if got_assis in assistants:
                 assistantdict[chat_id] = got_assis
                 userbot = await get_client(got_assis)
@@ -110,13 +226,9 @@ async def get_assistant(chat_id: int) -> str:
 async def set_calls_assistant(chat_id):
     from XMUSIC.core.userbot import assistants
 
-    ran_assistant = random.choice(assistants)
+    ran_assistant = least_loaded_assistant(assistants)
     assistantdict[chat_id] = ran_assistant
-    await assdb.update_one(
-        {"chat_id": chat_id},
-        {"$set": {"assistant": ran_assistant}},
-        upsert=True,
-    )
+    await set_chat_setting(chat_id, "assistant", ran_assistant)
     return ran_assistant
 
 
@@ -125,11 +237,10 @@ async def group_assistant(self, chat_id: int) -> int:
 
     assistant = assistantdict.get(chat_id)
     if not assistant:
-        dbassistant = await assdb.find_one({"chat_id": chat_id})
-        if not dbassistant:
+        assis = (await get_chat_settings(chat_id))["assistant"]
+        if not assis:
             assis = await set_calls_assistant(chat_id)
         else:
-            assis = dbassistant["assistant"]
             if assis in assistants:
                 assistantdict[chat_id] = assis
                 assis = assis
@@ -140,62 +251,30 @@ async def group_assistant(self, chat_id: int) -> int:
             assis = assistant
         else:
             assis = await set_calls_assistant(chat_id)
-    if int(assis) == 1:
-        return self.one
-    elif int(assis) == 2:
-        return self.two
-    elif int(assis) == 3:
-        return self.three
-    elif int(assis) == 4:
-        return self.four
-    elif int(assis) == 5:
-        return self.five
+    return self.get(assis)
 
 
 async def is_skipmode(chat_id: int) -> bool:
-    mode = skipmode.get(chat_id)
-    if not mode:
-        user = await skipdb.find_one({"chat_id": chat_id})
-        if not user:
-            skipmode[chat_id] = True
-            return True
-        skipmode[chat_id] = False
-        return False
-    return mode
+    return (await get_chat_settings(chat_id))["skipmode"]
 
 
 async def skip_on(chat_id: int):
-    skipmode[chat_id] = True
-    user = await skipdb.find_one({"chat_id": chat_id})
-    if user:
-        return await skipdb.delete_one({"chat_id": chat_id})
+    await set_chat_setting(chat_id, "skipmode", True)
 
 
 async def skip_off(chat_id: int):
-    skipmode[chat_id] = False
-    user = await skipdb.find_one({"chat_id": chat_id})
-    if not user:
-        return await skipdb.insert_one({"chat_id": chat_id})
+    await set_chat_setting(chat_id, "skipmode", False)
 
 
 async def get_upvote_count(chat_id: int) -> int:
-    mode = count.get(chat_id)
-    if not mode:
-        mode = await countdb.find_one({"chat_id": chat_id})
-        if not mode:
-            return 5
-        count[chat_id] = mode["mode"]
-        return mode["mode"]
-    return mode
+    return (await get_chat_settings(chat_id))["upvotes"]
 
 
 async def set_upvotes(chat_id: int, mode: int):
-    count[chat_id] = mode
-    await countdb.update_one(
-        {"chat_id": chat_id}, {"$set": {"mode": mode}}, upsert=True
-    )
+    await set_chat_setting(chat_id, "upvotes", mode)
 
 
+@cached(1, DB_CACHE_TTL, DB_CACHE_NEGATIVE_TTL)
 async def is_autoend() -> bool:
     chat_id = 1234
     user = await autoenddb.find_one({"chat_id": chat_id})
@@ -206,11 +285,13 @@ async def is_autoend() -> bool:
 
 async def autoend_on():
     chat_id = 1234
+    is_autoend.remember(True)
     await autoenddb.insert_one({"chat_id": chat_id})
 
 
 async def autoend_off():
     chat_id = 1234
+    is_autoend.remember(False)
     await autoenddb.delete_one({"chat_id": chat_id})
 
 
@@ -226,76 +307,43 @@ async def set_loop(chat_id: int, mode: int):
 
 
 async def get_cmode(chat_id: int) -> int:
-    mode = channelconnect.get(chat_id)
-    if not mode:
-        mode = await channeldb.find_one({"chat_id": chat_id})
-        if not mode:
-            return None
-        channelconnect[chat_id] = mode["mode"]
-        return mode["mode"]
-    return mode
+    return (await get_chat_settings(chat_id))["cmode"]
 
 
 async def set_cmode(chat_id: int, mode: int):
-    channelconnect[chat_id] = mode
-    await channeldb.update_one(
-        {"chat_id": chat_id}, {"$set": {"mode": mode}}, upsert=True
-    )
+    await set_chat_setting(chat_id, "cmode", mode)
 
 
 async def get_playtype(chat_id: int) -> str:
-    mode = playtype.get(chat_id)
-    if not mode:
-        mode = await playtypedb.find_one({"chat_id": chat_id})
-        if not mode:
-            playtype[chat_id] = "Everyone"
-            return "Everyone"
-        playtype[chat_id] = mode["mode"]
-        return mode["mode"]
-    return mode
+    return (await get_chat_settings(chat_id))["playtype"]
 
 
 async def set_playtype(chat_id: int, mode: str):
-    playtype[chat_id] = mode
-    await playtypedb.update_one(
-        {"chat_id": chat_id}, {"$set": {"mode": mode}}, upsert=True
-    )
+    await set_chat_setting(chat_id, "playtype", mode)
 
 
 async def get_playmode(chat_id: int) -> str:
-    mode = playmode.get(chat_id)
-    if not mode:
-        mode = await playmodedb.find_one({"chat_id": chat_id})
-        if not mode:
-            playmode[chat_id] = "Direct"
-            return "Direct"
-        playmode[chat_id] = mode["mode"]
-        return mode["mode"]
-    return mode
+    return (await get_chat_settings(chat_id))["playmode"]
 
 
 async def set_playmode(chat_id: int, mode: str):
-    playmode[chat_id] = mode
-    await playmodedb.update_one(
-        {"chat_id": chat_id}, {"$set": {"mode": mode}}, upsert=True
-    )
+    await set_chat_setting(chat_id, "playmode", mode)
+
+
+async def get_quality(chat_id: int) -> str:
+    return (await get_chat_settings(chat_id))["quality"]
+
+
+async def set_quality(chat_id: int, mode: str):
+    await set_chat_setting(chat_id, "quality", mode)
 
 
 async def get_lang(chat_id: int) -> str:
-    mode = langm.get(chat_id)
-    if not mode:
-        lang = await langdb.find_one({"chat_id": chat_id})
-        if not lang:
-            langm[chat_id] = "en"
-            return "en"
-        langm[chat_id] = lang["lang"]
-        return lang["lang"]
-    return mode
+    return (await get_chat_settings(chat_id))["lang"]
 
 
 async def set_lang(chat_id: int, lang: str):
-    langm[chat_id] = lang
-    await langdb.update_one({"chat_id": chat_id}, {"$set": {"lang": lang}}, upsert=True)
+    await set_chat_setting(chat_id, "lang", lang)
 
 
 async def is_music_playing(chat_id: int) -> bool:
@@ -347,6 +395,23 @@ async def remove_active_chat(chat_id: int):
         active.remove(chat_id)
 
 
+async def get_call_owner(chat_id: int) -> Union[int, None]:
+    return callowner.get(chat_id)
+
+
+async def set_call_owner(chat_id: int, assistant: int):
+    if assistant is not None:
+        callowner[chat_id] = int(assistant)
+
+
+async def remove_call_owner(chat_id: int) -> Union[int, None]:
+    return callowner.pop(chat_id, None)
+
+
+async def get_active_calls() -> Dict[int, int]:
+    return dict(callowner)
+
+
 async def get_active_video_chats() -> list:
     return activevideo
 
@@ -369,40 +434,22 @@ async def remove_active_video_chat(chat_id: int):
 
 
 async def check_nonadmin_chat(chat_id: int) -> bool:
-    user = await authdb.find_one({"chat_id": chat_id})
-    if not user:
-        return False
-    return True
+    return await is_nonadmin_chat(chat_id)
 
 
 async def is_nonadmin_chat(chat_id: int) -> bool:
-    mode = nonadmin.get(chat_id)
-    if not mode:
-        user = await authdb.find_one({"chat_id": chat_id})
-        if not user:
-            nonadmin[chat_id] = False
-            return False
-        nonadmin[chat_id] = True
-        return True
-    return mode
+    return (await get_chat_settings(chat_id))["nonadmin"]
 
 
 async def add_nonadmin_chat(chat_id: int):
-    nonadmin[chat_id] = True
-    is_admin = await check_nonadmin_chat(chat_id)
-    if is_admin:
-        return
-    return await authdb.insert_one({"chat_id": chat_id})
+    await set_chat_setting(chat_id, "nonadmin", True)
 
 
 async def remove_nonadmin_chat(chat_id: int):
-    nonadmin[chat_id] = False
-    is_admin = await check_nonadmin_chat(chat_id)
-    if not is_admin:
-        return
-    return await authdb.delete_one({"chat_id": chat_id})
+    await set_chat_setting(chat_id, "nonadmin", False)
 
 
+@cached(64, DB_CACHE_TTL, DB_CACHE_NEGATIVE_TTL)
 async def is_on_off(on_off: int) -> bool:
     onoff = await onoffdb.find_one({"on_off": on_off})
     if not onoff:
@@ -414,6 +461,7 @@ async def add_on(on_off: int):
     is_on = await is_on_off(on_off)
     if is_on:
         return
+    is_on_off.remember(True, on_off)
     return await onoffdb.insert_one({"on_off": on_off})
 
 
@@ -421,45 +469,24 @@ async def add_off(on_off: int):
     is_off = await is_on_off(on_off)
     if not is_off:
         return
+    is_on_off.remember(False, on_off)
     return await onoffdb.delete_one({"on_off": on_off})
 
 
 async def is_maintenance():
-    if not maintenance:
-        get = await onoffdb.find_one({"on_off": 1})
-        if not get:
-            maintenance.clear()
-            maintenance.append(2)
-            return True
-        else:
-            maintenance.clear()
-            maintenance.append(1)
-            return False
-    else:
-        if 1 in maintenance:
-            return False
-        else:
-            return True
+    # on_off 1 is set while maintenance is on, so True means "open".
+    return not await is_on_off(1)
 
 
 async def maintenance_off():
-    maintenance.clear()
-    maintenance.append(2)
-    is_off = await is_on_off(1)
-    if not is_off:
-        return
-    return await onoffdb.delete_one({"on_off": 1})
+    return await add_off(1)
 
 
 async def maintenance_on():
-    maintenance.clear()
-    maintenance.append(1)
-    is_on = await is_on_off(1)
-    if is_on:
-        return
-    return await onoffdb.insert_one({"on_off": 1})
+    return await add_on(1)
 
 
+@cached(DB_CACHE_MAX, DB_CACHE_TTL, DB_CACHE_NEGATIVE_TTL)
 async def is_served_user(user_id: int) -> bool:
     user = await usersdb.find_one({"user_id": user_id})
     if not user:
@@ -478,6 +505,7 @@ async def add_served_user(user_id: int):
     is_served = await is_served_user(user_id)
     if is_served:
         return
+    is_served_user.remember(True, user_id)
     return await usersdb.insert_one({"user_id": user_id})
 
 
@@ -488,6 +516,7 @@ async def get_served_chats() -> list:
     return chats_list
 
 
+@cached(DB_CACHE_MAX, DB_CACHE_TTL, DB_CACHE_NEGATIVE_TTL)
 async def is_served_chat(chat_id: int) -> bool:
     chat = await chatsdb.find_one({"chat_id": chat_id})
     if not chat:
@@ -499,11 +528,13 @@ async def add_served_chat(chat_id: int):
     is_served = await is_served_chat(chat_id)
     if is_served:
         return
+    is_served_chat.remember(True, chat_id)
     return await chatsdb.insert_one({"chat_id": chat_id})
 
 # New function to remove served chat
 async def remove_served_chat(chat_id: int):
     if await is_served_chat(chat_id):
+        is_served_chat.remember(False, chat_id)
         await chatsdb.delete_one({"chat_id": chat_id})
     
 
@@ -581,6 +612,7 @@ async def get_gbanned() -> list:
     return results
 
 
+@cached(DB_CACHE_MAX, DB_CACHE_TTL, DB_CACHE_NEGATIVE_TTL)
 async def is_gbanned_user(user_id: int) -> bool:
     user = await gbansdb.find_one({"user_id": user_id})
     if not user:
@@ -592,6 +624,7 @@ async def add_gban_user(user_id: int):
     is_gbanned = await is_gbanned_user(user_id)
     if is_gbanned:
         return
+    is_gbanned_user.remember(True, user_id)
     return await gbansdb.insert_one({"user_id": user_id})
 
 
@@ -599,6 +632,7 @@ async def remove_gban_user(user_id: int):
     is_gbanned = await is_gbanned_user(user_id)
     if not is_gbanned:
         return
+    is_gbanned_user.remember(False, user_id)
     return await gbansdb.delete_one({"user_id": user_id})
 
 
@@ -641,6 +675,7 @@ async def get_banned_count() -> int:
     return len(users)
 
 
+@cached(DB_CACHE_MAX, DB_CACHE_TTL, DB_CACHE_NEGATIVE_TTL)
 async def is_banned_user(user_id: int) -> bool:
     user = await blockeddb.find_one({"user_id": user_id})
     if not user:
@@ -652,6 +687,7 @@ async def add_banned_user(user_id: int):
     is_gbanned = await is_banned_user(user_id)
     if is_gbanned:
         return
+    is_banned_user.remember(True, user_id)
     return await blockeddb.insert_one({"user_id": user_id})
 
 
@@ -659,4 +695,5 @@ async def remove_banned_user(user_id: int):
     is_gbanned = await is_banned_user(user_id)
     if not is_gbanned:
         return
+    is_banned_user.remember(False, user_id)
     return await blockeddb.delete_one({"user_id": user_id})
@@ -16,10 +16,7 @@ from XMUSIC import YouTube, app
 from XMUSIC.misc import SUDOERS
 from XMUSIC.utils.database import (
     get_assistant,
-    get_cmode,
-    get_lang,
-    get_playmode,
-    get_playtype,
+    get_chat_settings,
     is_active_chat,
     is_maintenance,
 )
@@ -31,8 +28,9 @@ links = {}
 
 def PlayWrapper(command):
     async def wrapper(client, message):
-        language = await get_lang(message.chat.id)
-        _ = get_string(language)
+        # One lookup covers language, channel, play mode and play type.
+        settings = await get_chat_settings(message.chat.id)
+        _ = get_string(settings["lang"])
 
         if message.sender_chat:
             upl = InlineKeyboardMarkup(
@@ -82,7 +80,7 @@ def PlayWrapper(command):
                     reply_markup=InlineKeyboardMarkup(buttons),
                 )
         if message.command[0][0] == "c":
-            chat_id = await get_cmode(message.chat.id)
+            chat_id = settings["cmode"]
             if chat_id is None:
                 return await message.reply_text(_["setting_7"])
             try:
@@ -94,8 +92,8 @@ def PlayWrapper(command):
             chat_id = message.chat.id
             channel = None
 
-        playmode = await get_playmode(message.chat.id)
-        playty = await get_playtype(message.chat.id)
+        playmode = settings["playmode"]
+        playty = settings["playtype"]
         if playty != "Everyone":
             if message.from_user.id not in SUDOERS:
                 admins = adminlist.get(message.chat.id)
@@ -2,7 +2,9 @@ import asyncio
 import contextlib
 import os
 import re
-from typing import Dict, Optional, Union
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional, Tuple, Union
 
 import aiofiles
 import aiohttp
@@ -10,8 +12,9 @@ from aiohttp import TCPConnector
 from yt_dlp import YoutubeDL
 
 from XMUSIC.core.dir import DOWNLOAD_DIR as _DOWNLOAD_DIR, CACHE_DIR
+from XMUSIC.utils import media_cache
 from XMUSIC.utils.cookie_handler import COOKIE_PATH
-from XMUSIC.utils.tuning import CHUNK_SIZE, SEM
+from XMUSIC.utils.tuning import CHUNK_SIZE, SEM, YTDLP_WORKERS
 from config import API_KEY, API_URL
 
 USE_API: bool = bool(API_URL and API_KEY)
@@ -24,6 +27,11 @@ _inflight_lock = asyncio.Lock()
 _session: Optional[aiohttp.ClientSession] = None
 _session_lock = asyncio.Lock()
 
+# yt-dlp work runs on its own pool so it never starves the default
+# executor; every worker thread keeps its YoutubeDL instances alive.
+_ytdlp_pool = ThreadPoolExecutor(max_workers=YTDLP_WORKERS, thread_name_prefix="ytdlp")
+_ytdlp_local = threading.local()
+
 
 def extract_video_id(link: str) -> str:
     if "v=" in link:
@@ -43,11 +51,7 @@ def _cookiefile_path() -> Optional[str]:
 
 
 def file_exists(video_id: str) -> Optional[str]:
-    for ext in ("mp3", "m4a", "webm"):
-        path = f"{_DOWNLOAD_DIR}/{video_id}.{ext}"
-        if os.path.exists(path):
-            return path
-    return None
+    return media_cache.find(video_id, ("mp3", "m4a", "webm"))
 
 
 def _safe_filename(name: str) -> str:
@@ -76,6 +80,57 @@ def _ytdlp_base_opts() -> Dict[str, Union[str, int, bool]]:
     return opts
 
 
+def _ydl(name: str, opts: Dict) -> YoutubeDL:
+    instances = getattr(_ytdlp_local, "instances", None)
+    if instances is None:
+        instances = _ytdlp_local.instances = {}
+    ydl = instances.get(name)
+    if ydl is None:
+        ydl = instances[name] = YoutubeDL(opts)
+    return ydl
+
+
+async def run_ytdlp(func, *args):
+    return await asyncio.get_running_loop().run_in_executor(_ytdlp_pool, func, *args)
+
+
+def _flat_playlist(link: str, start: int, end: Optional[int]) -> List[str]:
+    opts = {
+        "quiet": True,
+        "no_warnings": True,
+        "extract_flat": "in_playlist",
+        "skip_download": True,
+        "ignoreerrors": True,
+        "cachedir": str(CACHE_DIR),
+    }
+    cookiefile = _cookiefile_path()
+    if cookiefile:
+        opts["cookiefile"] = cookiefile
+    ydl = _ydl("flat", opts)
+    ydl.params["playliststart"] = start
+    ydl.params["playlistend"] = end
+    info = ydl.extract_info(link, download=False) or {}
+    return [e["id"] for e in info.get("entries") or [] if e and e.get("id")]
+
+
+def _info(link: str) -> Dict[str, Any]:
+    opts = {"quiet": True, "no_warnings": True, "cachedir": str(CACHE_DIR)}
+    cookiefile = _cookiefile_path()
+    if cookiefile:
+        opts["cookiefile"] = cookiefile
+    return _ydl("info", opts).extract_info(link, download=False)
+
+
+async def extract_info(link: str) -> Dict[str, Any]:
+    return await run_ytdlp(_info, link)
+
+
+async def extract_flat_playlist(
+    link: str, start: int = 1, end: Optional[int] = None
+) -> List[str]:
+    return await run_ytdlp(_flat_playlist, link, start, end)
+
+
 async def _get_session() -> aiohttp.ClientSession:
     global _session
     if _session and not _session.closed:
@@ -110,32 +165,66 @@ async def api_download_song(link: str) -> Optional[str]:
                 dl = data.get("link")
                 fmt = str(data.get("format", "mp3")).lower()
                 out_path = f"{_DOWNLOAD_DIR}/{vid}.{fmt}"
-                async with session.get(dl) as fr:
-                    if fr.status != 200:
+                part = media_cache.part_path(out_path)
+                offset = os.path.getsize(part) if os.path.exists(part) else 0
+                headers = {"Range": f"bytes={offset}-"} if offset else None
+                async with session.get(dl, headers=headers) as fr:
+                    if fr.status == 206 and offset:
+                        total = fr.headers.get("Content-Range", "").rpartition("/")[2]
+                        total = int(total) if total.isdigit() else None
+                    elif fr.status == 200:
+                        offset = 0
+                        total = fr.content_length
+                    else:
                         return None
-                    async with aiofiles.open(out_path, "wb") as f:
+                    async with aiofiles.open(part, "ab" if offset else "wb") as f:
                         async for chunk in fr.content.iter_chunked(CHUNK_SIZE):
                             if not chunk:
                                 break
                             await f.write(chunk)
-                return out_path
+                if total and os.path.getsize(part) < total:
+                    return None
+                return media_cache.commit(part, out_path, total)
     except Exception:
         return None
 
 
-def _download_ytdlp(link: str, opts: Dict) -> Optional[str]:
+_INFO_KEYS = ("id", "title", "duration", "uploader", "ext", "thumbnail", "webpage_url")
+
+
+def _download_ytdlp(
+    name: str, link: str, opts: Dict
+) -> Tuple[Optional[str], Dict[str, Any]]:
     try:
-        with YoutubeDL(opts) as ydl:
-            info = ydl.extract_info(link, download=False)
-            ext = info.get("ext") or "webm"
-            vid = info.get("id")
-            path = f"{_DOWNLOAD_DIR}/{vid}.{ext}"
-            if os.path.exists(path):
-                return path
-            ydl.download([link])
-            return path
+        ydl = _ydl(name, opts)
+        info = ydl.extract_info(link, download=False)
+        if not info or info.get("_type") == "playlist":
+            return None, {}
+        meta = {k: info.get(k) for k in _INFO_KEYS}
+        path = f"{_DOWNLOAD_DIR}/{info.get('id')}.{info.get('ext') or 'webm'}"
+        if not os.path.exists(path):
+            # Download from the already-resolved info instead of letting
+            # ydl.download() extract the same video a second time.
+            ydl.process_info(info)
+        return path, meta
     except Exception:
-        return None
+        return None, {}
+
+
+_FORMATS = {
+    "audio": "bestaudio/best",
+    "video": "best[height<=?720][width<=?1280]",
+}
+
+
+async def ytdlp_fetch(link: str, type: str = "audio") -> Tuple[Optional[str], Dict[str, Any]]:
+    async def run():
+        opts = _ytdlp_base_opts()
+        opts.update({"format": _FORMATS[type]})
+        path, meta = await _with_sem(run_ytdlp(_download_ytdlp, type, link, opts))
+        return media_cache.register(path), meta
+
+    return await _dedup(f"{type[0]}:{link}", run) or (None, {})
 
 
 async def _with_sem(coro):
@@ -165,31 +254,9 @@ async def _dedup(key: str, runner):
 async def yt_dlp_download(
     link: str, type: str, format_id: str = None, title: str = None
 ) -> Optional[str]:
-    loop = asyncio.get_running_loop()
-
-    if type == "audio":
-        key = f"a:{link}"
-
-        async def run():
-            opts = _ytdlp_base_opts()
-            opts.update({"format": "bestaudio/best"})
-            return await _with_sem(
-                loop.run_in_executor(None, _download_ytdlp, link, opts)
-            )
-
-        return await _dedup(key, run)
-
-    if type == "video":
-        key = f"v:{link}"
-
-        async def run():
-            opts = _ytdlp_base_opts()
-            opts.update({"format": "best[height<=?720][width<=?1280]"})
-            return await _with_sem(
-                loop.run_in_executor(None, _download_ytdlp, link, opts)
-            )
-
-        return await _dedup(key, run)
+    if type in _FORMATS:
+        path, _ = await ytdlp_fetch(link, type)
+        return path
 
     if type == "song_video" and format_id and title:
         safe_title = _safe_filename(title)
@@ -206,7 +273,7 @@ async def yt_dlp_download(
                 }
             )
             await _with_sem(
-                loop.run_in_executor(None, lambda: YoutubeDL(opts).download([link]))
+                run_ytdlp(lambda: YoutubeDL(opts).download([link]))
             )
             return f"{_DOWNLOAD_DIR}/{safe_title}.mp4"
 
@@ -233,7 +300,7 @@ async def yt_dlp_download(
                 }
             )
             await _with_sem(
-                loop.run_in_executor(None, lambda: YoutubeDL(opts).download([link]))
+                run_ytdlp(lambda: YoutubeDL(opts).download([link]))
             )
             return f"{_DOWNLOAD_DIR}/{safe_title}.mp3"
 
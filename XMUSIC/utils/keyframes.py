@@ -0,0 +1,68 @@
+import asyncio
+import bisect
+import os
+from typing import List, Optional
+
+from XMUSIC.logging import LOGGER
+from XMUSIC.utils.ttlcache import MISSING, TTLCache
+
+# Seeking never lands further than this before the requested second; with
+# longer GOPs the seek falls back to ffmpeg's accurate input seeking.
+MAX_SNAP = 5
+
+_index = TTLCache(maxsize=256, ttl=6 * 60 * 60)
+_tasks = set()
+
+
+async def _probe(path: str) -> List[float]:
+    # Reads packet headers only, so this costs a fraction of a decode.
+    proc = await asyncio.create_subprocess_exec(
+        "ffprobe", "-v", "error", "-select_streams", "v:0",
+        "-show_entries", "packet=pts_time,flags", "-of", "csv=p=0", path,
+        stdout=asyncio.subprocess.PIPE,
+        stderr=asyncio.subprocess.DEVNULL,
+    )
+    out, _ = await proc.communicate()
+    points = []
+    for line in out.decode(errors="ignore").splitlines():
+        pts, _, flags = line.partition(",")
+        if "K" in flags:
+            try:
+                points.append(float(pts))
+            except ValueError:
+                continue
+    points.sort()
+    return points
+
+
+async def build(path: str) -> List[float]:
+    if not path or not os.path.isfile(path):
+        return []
+
+    async def fetch():
+        try:
+            return await _probe(path)
+        except Exception as e:
+            LOGGER(__name__).warning(f"Keyframe index failed for {path}: {e}")
+            return []
+
+    return await _index.get_or_fetch(path, fetch) or []
+
+
+def schedule(path: str):
+    if not path or _index.get(path, MISSING) is not MISSING:
+        return
+    task = asyncio.create_task(build(path))
+    _tasks.add(task)
+    task.add_done_callback(_tasks.discard)
+
+
+def nearest(path: str, seconds: float) -> Optional[float]:
+    points = _index.get(path)
+    if not points:
+        schedule(path)
+        return None
+    at = bisect.bisect_right(points, seconds) - 1
+    if at < 0 or seconds - points[at] > MAX_SNAP:
+        return None
+    return points[at]
@@ -0,0 +1,263 @@
+import asyncio
+import os
+import time
+from typing import Dict, Iterable, Optional, Set
+
+from XMUSIC.core.dir import DOWNLOAD_DIR
+from XMUSIC.logging import LOGGER
+from XMUSIC.utils.tuning import MEDIA_CACHE_POLICY, MEDIA_CACHE_SIZE
+
+PART_SUFFIX = ".part"
+
+# Files touched this recently are never evicted, even when unpinned, so a
+# track that was just downloaded cannot disappear before it is queued.
+_GRACE = 120
+# Eviction trims down to this fraction of the budget to avoid thrashing.
+_LOW_WATER = 0.9
+_PART_MAX_AGE = 24 * 60 * 60
+
+
+class _Entry:
+    __slots__ = ("size", "atime", "hits")
+
+    def __init__(self, size: int, atime: float, hits: int = 0):
+        self.size = size
+        self.atime = atime
+        self.hits = hits
+
+
+_index: Dict[str, _Entry] = {}
+_total = 0
+_scanned = False
+_evict_lock = asyncio.Lock()
+_evict_task: Optional[asyncio.Task] = None
+
+stats = {"hits": 0, "misses": 0, "evicted": 0, "evicted_bytes": 0}
+
+
+def _key(path: str) -> str:
+    return os.path.abspath(path)
+
+
+def managed(path: str) -> bool:
+    try:
+        return os.path.dirname(_key(path)) == _key(DOWNLOAD_DIR)
+    except Exception:
+        return False
+
+
+def _add(key: str, size: int, atime: float):
+    global _total
+    old = _index.get(key)
+    if old:
+        _total -= old.size
+        old.size, old.atime = size, atime
+    else:
+        _index[key] = _Entry(size, atime)
+    _total += size
+
+
+def _drop(key: str):
+    global _total
+    old = _index.pop(key, None)
+    if old:
+        _total -= old.size
+
+
+def _scan():
+    global _scanned
+    _scanned = True
+    try:
+        names = os.listdir(DOWNLOAD_DIR)
+    except FileNotFoundError:
+        return
+    for name in names:
+        path = os.path.join(DOWNLOAD_DIR, name)
+        try:
+            st = os.stat(path)
+        except OSError:
+            continue
+        if not os.path.isfile(path):
+            continue
+        if name.endswith(PART_SUFFIX):
+            # Recent parts are kept so an interrupted download can resume.
+            if time.time() - st.st_mtime > _PART_MAX_AGE:
+                discard(path)
+            continue
+        _add(_key(path), st.st_size, st.st_mtime)
+    LOGGER(__name__).info(
+        f"Media cache: {len(_index)} files, {_total / (1024 * 1024):.1f} MiB"
+    )
+
+
+def _ensure_scanned():
+    if not _scanned:
+        _scan()
+
+
+def lookup(path: str) -> Optional[str]:
+    _ensure_scanned()
+    key = _key(path)
+    if os.path.isfile(path) and os.path.getsize(path) > 0:
+        entry = _index.get(key)
+        if entry is None:
+            _add(key, os.path.getsize(path), time.time())
+            entry = _index[key]
+        entry.atime = time.time()
+        entry.hits += 1
+        stats["hits"] += 1
+        return path
+    _drop(key)
+    stats["misses"] += 1
+    return None
+
+
+def find(video_id: str, exts: Iterable[str]) -> Optional[str]:
+    _ensure_scanned()
+    for ext in exts:
+        path = os.path.join(DOWNLOAD_DIR, f"{video_id}.{ext}")
+        if os.path.isfile(path) and os.path.getsize(path) > 0:
+            return lookup(path)
+    stats["misses"] += 1
+    return None
+
+
+def part_path(path: str) -> str:
+    return f"{path}{PART_SUFFIX}"
+
+
+def discard(part: str):
+    try:
+        os.remove(part)
+    except OSError:
+        pass
+
+
+def register(path: Optional[str]) -> Optional[str]:
+    if not path or not managed(path):
+        return path
+    _ensure_scanned()
+    try:
+        size = os.path.getsize(path)
+    except OSError:
+        _drop(_key(path))
+        return path
+    _add(_key(path), size, time.time())
+    _schedule_evict()
+    return path
+
+
+def _sniff(path: str) -> bool:
+    with open(path, "rb") as f:
+        head = f.read(12)
+    if len(head) < 12:
+        return False
+    return (
+        head[:3] == b"ID3"
+        or (head[0] == 0xFF and head[1] & 0xE0 == 0xE0)
+        or head[4:8] == b"ftyp"
+        or head[:4] in (b"\x1aE\xdf\xa3", b"OggS", b"fLaC", b"RIFF")
+    )
+
+
+def valid(path: str, expected: Optional[int] = None) -> bool:
+    try:
+        size = os.path.getsize(path)
+        if size <= 0 or (expected and size != expected):
+            return False
+        return _sniff(path)
+    except OSError:
+        return False
+
+
+def commit(part: str, path: str, expected: Optional[int] = None) -> Optional[str]:
+    if not valid(part, expected):
+        discard(part)
+        return None
+    try:
+        os.replace(part, path)
+    except OSError:
+        discard(part)
+        return None
+    return register(path)
+
+
+def pinned() -> Set[str]:
+    from XMUSIC.misc import db
+
+    paths, ids = set(), set()
+    for queue in list(db.values()):
+        for item in list(queue or []):
+            try:
+                file = str(item.get("file") or "")
+            except AttributeError:
+                continue
+            for name in (file, item.get("speed_path")):
+                if name and os.path.sep in str(name):
+                    paths.add(_key(str(name)))
+            vidid = item.get("vidid")
+            if vidid:
+                ids.add(str(vidid))
+            if file.startswith("vid_"):
+                ids.add(file[4:])
+    if ids:
+        for key in _index:
+            if os.path.basename(key).rsplit(".", 1)[0] in ids:
+                paths.add(key)
+    return paths
+
+
+def _victims():
+    if MEDIA_CACHE_POLICY == "lfu":
+        return sorted(_index.items(), key=lambda kv: (kv[1].hits, kv[1].atime))
+    return sorted(_index.items(), key=lambda kv: kv[1].atime)
+
+
+async def evict() -> int:
+    _ensure_scanned()
+    if _total <= MEDIA_CACHE_SIZE:
+        return 0
+    async with _evict_lock:
+        target = int(MEDIA_CACHE_SIZE * _LOW_WATER)
+        keep = pinned()
+        now = time.time()
+        freed = 0
+        for key, entry in _victims():
+            if _total <= target:
+                break
+            if key in keep or now - entry.atime < _GRACE:
+                continue
+            if os.path.exists(part_path(key)):
+                continue
+            try:
+                os.remove(key)
+            except FileNotFoundError:
+                pass
+            except OSError:
+                continue
+            freed += entry.size
+            stats["evicted"] += 1
+            stats["evicted_bytes"] += entry.size
+            _drop(key)
+        if _total > MEDIA_CACHE_SIZE:
+            LOGGER(__name__).warning(
+                "Media cache is over budget but every remaining file is pinned."
+            )
+        return freed
+
+
+def _schedule_evict():
+    global _evict_task
+    if _total <= MEDIA_CACHE_SIZE:
+        return
+    if _evict_task and not _evict_task.done():
+        return
+    try:
+        _evict_task = asyncio.get_running_loop().create_task(evict())
+    except RuntimeError:
+        pass
+
+
+def usage() -> Dict[str, int]:
+    _ensure_scanned()
+    return {"files": len(_index), "bytes": _total, "limit": MEDIA_CACHE_SIZE, **stats}
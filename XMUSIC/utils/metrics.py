@@ -0,0 +1,119 @@
+import bisect
+import functools
+import time
+from collections import deque
+from typing import Dict
+
+# Upper bounds in seconds; observations above the last one land in +Inf.
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+
+
+class Histogram:
+    __slots__ = ("counts", "count", "sum", "max", "errors", "recent")
+
+    def __init__(self):
+        self.counts = [0] * (len(BUCKETS) + 1)
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+        self.errors = 0
+        # Quantiles come from the most recent samples so they follow load.
+        self.recent = deque(maxlen=512)
+
+    def observe(self, seconds: float, error: bool = False):
+        self.counts[bisect.bisect_left(BUCKETS, seconds)] += 1
+        self.count += 1
+        self.sum += seconds
+        self.max = max(self.max, seconds)
+        self.recent.append(seconds)
+        if error:
+            self.errors += 1
+
+    def quantile(self, q: float) -> float:
+        if not self.recent:
+            return 0.0
+        ordered = sorted(self.recent)
+        return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+histograms: Dict[str, Histogram] = {}
+
+
+def observe(name: str, seconds: float, error: bool = False):
+    hist = histograms.get(name)
+    if hist is None:
+        hist = histograms[name] = Histogram()
+    hist.observe(seconds, error)
+
+
+class span:
+    """Times a block into the histogram ``name``; usable with ``with`` and
+    ``async with``. Exceptions are counted and re-raised."""
+
+    __slots__ = ("name", "start")
+
+    def __init__(self, name: str):
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        observe(self.name, time.perf_counter() - self.start, exc_type is not None)
+        return False
+
+    async def __aenter__(self):
+        return self.__enter__()
+
+    async def __aexit__(self, exc_type, exc, tb):
+        return self.__exit__(exc_type, exc, tb)
+
+
+def timed(name: str):
+    def decorator(func):
+        @functools.wraps(func)
+        async def wrapper(*args, **kwargs):
+            with span(name):
+                return await func(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
+
+
+def summary() -> Dict[str, dict]:
+    return {
+        name: {
+            "count": hist.count,
+            "errors": hist.errors,
+            "avg": hist.sum / hist.count if hist.count else 0.0,
+            "p50": hist.quantile(0.5),
+            "p95": hist.quantile(0.95),
+            "p99": hist.quantile(0.99),
+            "max": hist.max,
+        }
+        for name, hist in sorted(histograms.items())
+    }
+
+
+def reset():
+    histograms.clear()
+
+
+def prometheus() -> str:
+    lines = [
+        "# HELP xmusic_latency_seconds Latency of playback operations.",
+        "# TYPE xmusic_latency_seconds histogram",
+    ]
+    for name, hist in sorted(histograms.items()):
+        label = f'op="{name}"'
+        total = 0
+        for bound, count in zip(BUCKETS, hist.counts):
+            total += count
+            lines.append(f'xmusic_latency_seconds_bucket{{{label},le="{bound}"}} {total}')
+        lines.append(f'xmusic_latency_seconds_bucket{{{label},le="+Inf"}} {hist.count}')
+        lines.append(f"xmusic_latency_seconds_sum{{{label}}} {hist.sum:.6f}")
+        lines.append(f"xmusic_latency_seconds_count{{{label}}} {hist.count}")
+        lines.append(f"xmusic_latency_errors_total{{{label}}} {hist.errors}")
+    return "\n".join(lines) + "\n"
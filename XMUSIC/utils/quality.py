@@ -0,0 +1,110 @@
+import asyncio
+import os
+import time
+
+import psutil
+from pytgcalls.types import AudioQuality, MediaStream, VideoQuality
+
+from XMUSIC.utils.database import get_quality
+from XMUSIC.utils.ttlcache import MISSING, TTLCache
+from XMUSIC.utils.tuning import (
+    QUALITY_CPU_BUSY,
+    QUALITY_CPU_SATURATED,
+    STREAM_QUALITY,
+)
+
+# Lowest to highest. Nothing above the source resolution is ever picked, so
+# a 720p download is not upscaled and re-encoded at 1080p.
+ORDER = ["low", "medium", "high", "studio"]
+PROFILES = {
+    "low": (AudioQuality.LOW, VideoQuality.SD_360p, 360),
+    "medium": (AudioQuality.MEDIUM, VideoQuality.SD_480p, 480),
+    "high": (AudioQuality.HIGH, VideoQuality.HD_720p, 720),
+    "studio": (AudioQuality.STUDIO, VideoQuality.FHD_1080p, 1080),
+}
+# Assumed for remote sources and anything ffprobe cannot read; matches the
+# downloader's best[height<=?720] cap.
+DEFAULT_HEIGHT = 720
+
+heights = TTLCache(maxsize=1024, ttl=3600)
+_probes = {}
+_cpu = {"at": 0.0, "load": 0.0}
+
+
+def cpu_load() -> float:
+    now = time.monotonic()
+    if now - _cpu["at"] >= 2:
+        _cpu["load"] = psutil.cpu_percent(interval=None)
+        _cpu["at"] = now
+    return _cpu["load"]
+
+
+async def source_height(path: str) -> int:
+    if not path or not os.path.isfile(path):
+        return DEFAULT_HEIGHT
+    cached = heights.get(path, MISSING)
+    if cached is not MISSING:
+        return cached
+    try:
+        proc = await asyncio.create_subprocess_exec(
+            "ffprobe", "-v", "error", "-select_streams", "v:0",
+            "-show_entries", "stream=height", "-of", "csv=p=0", path,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.DEVNULL,
+        )
+        out, _ = await asyncio.wait_for(proc.communicate(), 5)
+        height = int(out.decode().split()[0])
+    except Exception:
+        height = DEFAULT_HEIGHT
+    heights.set(path, height)
+    return height
+
+
+def schedule(path: str):
+    if not path or path in _probes or heights.get(path, MISSING) is not MISSING:
+        return
+    _probes[path] = asyncio.create_task(source_height(path))
+    _probes[path].add_done_callback(lambda _: _probes.pop(path, None))
+
+
+def known_height(path: str) -> int:
+    # Never probes inline: a miss queues ffprobe for next time and assumes
+    # DEFAULT_HEIGHT, so starting a stream does not wait on it.
+    if not path or not os.path.isfile(path):
+        return DEFAULT_HEIGHT
+    height = heights.get(path, MISSING)
+    if height is MISSING:
+        schedule(path)
+        return DEFAULT_HEIGHT
+    return height
+
+
+def _for_height(height: int) -> str:
+    best = ORDER[0]
+    for name in ORDER:
+        if PROFILES[name][2] <= height:
+            best = name
+    return best
+
+
+async def pick(chat_id: int, path: str, video: bool) -> str:
+    name = await get_quality(chat_id) if chat_id else "auto"
+    if name not in PROFILES:
+        name = STREAM_QUALITY
+    ceiling = _for_height(known_height(path)) if video else ORDER[-1]
+    if name not in PROFILES:
+        name = ceiling if video else "high"
+    level = min(ORDER.index(name), ORDER.index(ceiling))
+    load = cpu_load()
+    if load >= QUALITY_CPU_SATURATED:
+        level -= 2
+    elif load >= QUALITY_CPU_BUSY:
+        level -= 1
+    return ORDER[max(level, 0)]
+
+
+async def media_stream(chat_id, path, video, ffmpeg_parameters=None) -> MediaStream:
+    audio, video_quality, _ = PROFILES[await pick(chat_id, path, video)]
+    if video:
+        return MediaStream(path, audio_parameters=audio, video_parameters=video_quality, ffmpeg_parameters=ffmpeg_parameters)
+    return MediaStream(path, audio_parameters=audio, video_flags=MediaStream.Flags.IGNORE, ffmpeg_parameters=ffmpeg_parameters)
@@ -1,6 +1,7 @@
 import os
 
 from config import autoclean
+from XMUSIC.utils import media_cache
 
 
 async def auto_clean(popped):
@@ -9,10 +10,14 @@ async def auto_clean(popped):
         autoclean.remove(rem)
         count = autoclean.count(rem)
         if count == 0:
-            if "vid_" not in rem or "live_" not in rem or "index_" not in rem:
-                try:
-                    os.remove(rem)
-                except:
-                    pass
+            if "vid_" in rem or "live_" in rem or "index_" in rem:
+                return
+            if media_cache.managed(rem):
+                media_cache.register(rem)
+                return
+            try:
+                os.remove(rem)
+            except:
+                pass
     except:
         pass
@@ -0,0 +1,117 @@
+import time
+from collections import deque
+from typing import Any
+
+
+class QueueEntry:
+    """One queued track.
+
+    Every name in ``FIELDS`` is readable with item access (``entry["file"]``,
+    ``entry.get("speed")``) like the old dict entries. All of them are stored
+    in ``__slots__`` except ``played``, which is excluded and computed from a
+    monotonic clock. The clock restarts whenever ``played`` is assigned (a
+    track starting, a seek or a speed change) and stops while the stream is
+    paused.
+    """
+
+    FIELDS = (
+        "title",
+        "dur",
+        "streamtype",
+        "by",
+        "user_id",
+        "chat_id",
+        "file",
+        "vidid",
+        "seconds",
+        "played",
+        "mystic",
+        "markup",
+        "old_dur",
+        "old_second",
+        "speed_path",
+        "speed",
+    )
+    __slots__ = tuple(name for name in FIELDS if name != "played") + (
+        "_offset",
+        "_started",
+        "_paused_at",
+    )
+
+    def __init__(self, **fields):
+        for name in self.FIELDS:
+            if name != "played":
+                setattr(self, name, None)
+        # Queued entries keep a stopped clock until they start playing.
+        self._offset = fields.pop("played", 0) or 0
+        self._started = None
+        self._paused_at = None
+        for name, value in fields.items():
+            self[name] = value
+
+    @property
+    def played(self) -> int:
+        if self._started is None:
+            return int(self._offset)
+        now = self._paused_at if self._paused_at is not None else time.monotonic()
+        position = int(self._offset + now - self._started)
+        seconds = int(self.seconds or 0)
+        return min(position, seconds) if seconds > 0 else position
+
+    @played.setter
+    def played(self, value):
+        self._offset = value
+        self._started = time.monotonic()
+        if self._paused_at is not None:
+            self._paused_at = self._started
+
+    def pause_clock(self):
+        if self._started is not None and self._paused_at is None:
+            self._paused_at = time.monotonic()
+
+    def resume_clock(self):
+        if self._paused_at is not None:
+            self._started += time.monotonic() - self._paused_at
+            self._paused_at = None
+
+    def __getitem__(self, key: str) -> Any:
+        if key not in self.FIELDS:
+            raise KeyError(key)
+        return getattr(self, key)
+
+    def __setitem__(self, key: str, value: Any):
+        if key not in self.FIELDS:
+            raise KeyError(key)
+        setattr(self, key, value)
+
+    def __contains__(self, key: str) -> bool:
+        return key in self.FIELDS and getattr(self, key) is not None
+
+    def get(self, key: str, default: Any = None) -> Any:
+        value = getattr(self, key, None) if key in self.FIELDS else None
+        return default if value is None else value
+
+    def to_dict(self) -> dict:
+        return {name: getattr(self, name) for name in self.FIELDS}
+
+    def __repr__(self) -> str:
+        return f"QueueEntry({self.title!r}, file={self.file!r})"
+
+
+class ChatQueue(deque):
+    """Per-chat queue; the head is the track currently playing.
+
+    ``pop(0)`` is the common case (track ended, skip) and is O(1) here,
+    where it shifted the whole list before.
+    """
+
+    __slots__ = ()
+
+    def pop(self, index: int = -1):
+        if index == 0:
+            return self.popleft()
+        if index == -1 or index == len(self) - 1:
+            return super().pop()
+        item = self[index]
+        del self[index]
+        return item
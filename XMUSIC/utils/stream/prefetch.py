@@ -0,0 +1,56 @@
+import asyncio
+from typing import Dict
+
+from XMUSIC import YouTube
+from XMUSIC.misc import db
+from XMUSIC.utils.tuning import PREFETCH_AHEAD, PREFETCH_CONCURRENCY
+
+_sem = asyncio.Semaphore(PREFETCH_CONCURRENCY)
+_tasks: Dict[int, Dict[str, asyncio.Task]] = {}
+
+
+def _upcoming(chat_id: int) -> Dict[str, tuple]:
+    wanted = {}
+    queue = db.get(chat_id) or []
+    for item in list(queue)[1 : 1 + PREFETCH_AHEAD]:
+        file = str(item.get("file") or "")
+        if not file.startswith("vid_"):
+            continue
+        video = str(item.get("streamtype")) == "video"
+        wanted[f"{'v' if video else 'a'}:{item['vidid']}"] = (item["vidid"], video)
+    return wanted
+
+
+async def _fetch(vidid: str, video: bool):
+    async with _sem:
+        await YouTube.download(vidid, None, video=True if video else None, videoid=True)
+
+
+def schedule(chat_id: int):
+    wanted = _upcoming(chat_id)
+    running = _tasks.setdefault(chat_id, {})
+    for key in list(running):
+        if key not in wanted:
+            running.pop(key).cancel()
+    for key, (vidid, video) in wanted.items():
+        if key in running:
+            continue
+        task = asyncio.create_task(_fetch(vidid, video))
+        running[key] = task
+
+        def _done(t, key=key):
+            if _tasks.get(chat_id, {}).get(key) is t:
+                _tasks[chat_id].pop(key, None)
+
+        task.add_done_callback(_done)
+    if not running:
+        _tasks.pop(chat_id, None)
+
+
+def cancel(chat_id: int):
+    for task in (_tasks.pop(chat_id, None) or {}).values():
+        task.cancel()
+
+
+def pending() -> int:
+    return sum(len(tasks) for tasks in _tasks.values())
@@ -0,0 +1,170 @@
+import asyncio
+import os
+import time
+
+from pymongo import DeleteOne, UpdateOne
+
+from XMUSIC import YouTube
+from XMUSIC.core.call import JARVIS
+from XMUSIC.core.mongo import mongodb
+from XMUSIC.logging import LOGGER
+from XMUSIC.misc import db
+from XMUSIC.utils.database import (
+    activevideo,
+    assistantdict,
+    callowner,
+    get_active_chats,
+)
+from XMUSIC.utils.stream import prefetch
+from XMUSIC.utils.stream.chatqueue import ChatQueue, QueueEntry
+from XMUSIC.utils.tuning import SNAPSHOT_INTERVAL, SNAPSHOT_POSITION_INTERVAL
+
+snapshotdb = mongodb.queuesnapshots
+
+# Fields that cannot outlive the process (the now-playing Message object).
+_TRANSIENT = ("mystic",)
+
+_saved = {}
+_writer = None
+
+
+def _signature(queue) -> tuple:
+    return tuple(str(entry["file"]) for entry in queue) + (queue[0].get("speed"),)
+
+
+def _document(chat_id: int, queue) -> dict:
+    items = []
+    for entry in queue:
+        item = entry.to_dict()
+        for name in _TRANSIENT:
+            item.pop(name, None)
+        items.append(item)
+    return {
+        "chat_id": chat_id,
+        "assistant": callowner.get(chat_id) or assistantdict.get(chat_id),
+        "video": chat_id in activevideo,
+        "queue": items,
+        "saved_at": time.time(),
+    }
+
+
+async def save(force: bool = False):
+    now = time.monotonic()
+    active = set(await get_active_chats())
+    ops = []
+    for chat_id in active:
+        queue = db.get(chat_id)
+        if not queue:
+            continue
+        sig = _signature(queue)
+        last = _saved.get(chat_id)
+        # Unchanged queues are only rewritten to refresh the played offset.
+        if not force and last and last[0] == sig and now - last[1] < SNAPSHOT_POSITION_INTERVAL:
+            continue
+        ops.append(
+            UpdateOne({"chat_id": chat_id}, {"$set": _document(chat_id, queue)}, upsert=True)
+        )
+        _saved[chat_id] = (sig, now)
+    for chat_id in list(_saved):
+        if chat_id not in active or not db.get(chat_id):
+            ops.append(DeleteOne({"chat_id": chat_id}))
+            _saved.pop(chat_id, None)
+    if ops:
+        await snapshotdb.bulk_write(ops, ordered=False)
+
+
+async def _write_behind():
+    while True:
+        await asyncio.sleep(SNAPSHOT_INTERVAL)
+        try:
+            await save()
+        except Exception as e:
+            LOGGER(__name__).warning(f"Queue snapshot failed: {e}")
+
+
+def start():
+    global _writer
+    if _writer is None or _writer.done():
+        _writer = asyncio.create_task(_write_behind())
+
+
+async def flush():
+    """Writes every live queue and stops the writer, so the teardown that
+    follows (restart, update) does not delete the snapshots again. Call
+    start() if the process keeps running after all."""
+    global _writer
+    if _writer:
+        _writer.cancel()
+        _writer = None
+    try:
+        await save(force=True)
+    except Exception as e:
+        LOGGER(__name__).warning(f"Queue snapshot flush failed: {e}")
+
+
+async def _source(entry: QueueEntry, video: bool):
+    file = str(entry["file"])
+    vidid = entry["vidid"]
+    if "live_" in file:
+        n, link = await YouTube.video(vidid, True)
+        return link if n else None
+    if "index_" in file:
+        return vidid
+    if "vid_" not in file and os.path.isfile(file):
+        return file
+    if vidid in ("telegram", "soundcloud"):
+        return None
+    path, direct = await YouTube.download(vidid, None, videoid=True, video=True if video else None)
+    return path
+
+
+async def _resume(doc: dict):
+    chat_id = doc["chat_id"]
+    entries = []
+    for item in doc.get("queue") or []:
+        fields = {k: v for k, v in item.items() if k in QueueEntry.FIELDS and k not in _TRANSIENT}
+        entries.append(QueueEntry(**fields))
+    if not entries:
+        return False
+    head = entries[0]
+    offset = int(head["played"] or 0)
+    if head.get("old_dur"):
+        # Resume at normal speed; played was on the sped-up timeline.
+        offset = int(offset * float(head.get("speed") or 1.0))
+        head["dur"] = head["old_dur"]
+        head["seconds"] = head["old_second"]
+        head["speed_path"] = None
+        head["speed"] = 1.0
+    video = str(head["streamtype"]) == "video"
+    if "live_" in str(head["file"]):
+        offset = 0
+    source = await _source(head, video)
+    if not source:
+        return False
+    if "vid_" in str(head["file"]) and os.path.isfile(source):
+        head["file"] = source
+    if doc.get("assistant"):
+        assistantdict[chat_id] = doc["assistant"]
+    db[chat_id] = ChatQueue(entries)
+    await JARVIS.join_call(
+        chat_id, head["chat_id"], source, video=True if video else None, offset=offset
+    )
+    head["played"] = offset
+    prefetch.schedule(chat_id)
+    return True
+
+
+async def restore():
+    resumed = failed = 0
+    async for doc in snapshotdb.find({}):
+        try:
+            if await _resume(doc):
+                resumed += 1
+                continue
+        except Exception as e:
+            LOGGER(__name__).warning(f"Could not resume chat {doc.get('chat_id')}: {e}")
+        db.pop(doc.get("chat_id"), None)
+        failed += 1
+        await snapshotdb.delete_one({"chat_id": doc.get("chat_id")})
+    if resumed or failed:
+        LOGGER(__name__).info(f"Resumed {resumed} chats from snapshots, dropped {failed}.")
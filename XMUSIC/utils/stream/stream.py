@@ -20,6 +20,8 @@
 # Email: badboy809075@gmail.com
 
 
+import asyncio
+import contextlib
 import os
 from random import randint
 from typing import Union
@@ -31,13 +33,50 @@ from XMUSIC import Carbon, YouTube, app
 from XMUSIC.core.call import JARVIS
 from XMUSIC.misc import db
 from XMUSIC.utils.database import add_active_video_chat, is_active_chat
+from XMUSIC.utils import metrics
 from XMUSIC.utils.exceptions import AssistantErr
+from XMUSIC.utils.formatters import time_to_seconds
 from XMUSIC.utils.inline import aq_markup, close_markup, stream_markup
 from XMUSIC.utils.pastebin import XMUSICBIN
+from XMUSIC.utils.stream.chatqueue import ChatQueue
 from XMUSIC.utils.stream.queue import put_queue, put_queue_index
 from XMUSIC.utils.thumbnails import get_thumb
+from XMUSIC.utils.tuning import PLAYLIST_CONCURRENCY
 
 
+# Pages fetched past the first one to replace items that could not be queued.
+_MAX_PAGES = 3
+
+
+async def _resolve_playlist(searches, spotify, more=None):
+    sem = asyncio.Semaphore(PLAYLIST_CONCURRENCY)
+
+    async def resolve(search):
+        async with sem:
+            try:
+                return await YouTube.details(search, False if spotify else True)
+            except Exception:
+                return None
+
+    offset, pages = 0, 0
+    page = list(searches)
+    while page:
+        tasks = [asyncio.create_task(resolve(search)) for search in page]
+        try:
+            for task in tasks:
+                yield await task
+        finally:
+            for task in tasks:
+                task.cancel()
+        offset += len(page)
+        pages += 1
+        if more is None or pages > _MAX_PAGES:
+            return
+        # Resume from the last index when the consumer still wants items.
+        page = list(await more(offset) or [])[: config.PLAYLIST_FETCH_LIMIT]
+
+
+@metrics.timed("stream.pipeline")
 async def stream(
     _,
     mystic,
@@ -50,6 +89,7 @@ async def stream(
     streamtype: Union[bool, str] = None,
     spotify: Union[bool, str] = None,
     forceplay: Union[bool, str] = None,
+    more=None,
 ):
     if not result:
         return
@@ -58,83 +98,90 @@ async def stream(
     if streamtype == "playlist":
         msg = f"{_['play_19']}\n\n"
         count = 0
-        for search in result:
-            if int(count) == config.PLAYLIST_FETCH_LIMIT:
-                continue
-            try:
+        # Items are looked up one page of PLAYLIST_FETCH_LIMIT at a time, and
+        # leaving the loop cancels whatever lookups are still running.
+        async with contextlib.aclosing(
+            _resolve_playlist(result[: config.PLAYLIST_FETCH_LIMIT], spotify, more)
+        ) as resolved:
+            async for details in resolved:
+                if int(count) == config.PLAYLIST_FETCH_LIMIT:
+                    break
+                if not details:
+                    continue
                 (
                     title,
                     duration_min,
                     duration_sec,
                     thumbnail,
                     vidid,
-                ) = await YouTube.details(search, False if spotify else True)
-            except:
-                continue
-            if str(duration_min) == "None":
-                continue
-            if duration_sec > config.DURATION_LIMIT:
-                continue
-            if await is_active_chat(chat_id):
-                await put_queue(
-                    chat_id,
-                    original_chat_id,
-                    f"vid_{vidid}",
-                    title,
-                    duration_min,
-                    user_name,
-                    vidid,
-                    user_id,
-                    "video" if video else "audio",
-                )
-                position = len(db.get(chat_id)) - 1
-                count += 1
-                msg += f"{count}. {title[:70]}\n"
-                msg += f"{_['play_20']} {position}\n\n"
-            else:
-                if not forceplay:
-                    db[chat_id] = []
-                status = True if video else None
-                try:
-                    file_path, direct = await YouTube.download(
-                        vidid, mystic, video=status, videoid=True
+                ) = details
+                if str(duration_min) == "None":
+                    continue
+                if duration_sec > config.DURATION_LIMIT:
+                    continue
+                if await is_active_chat(chat_id):
+                    await put_queue(
+                        chat_id,
+                        original_chat_id,
+                        f"vid_{vidid}",
+                        title,
+                        duration_min,
+                        user_name,
+                        vidid,
+                        user_id,
+                        "video" if video else "audio",
                     )
-                except:
-                    raise AssistantErr(_["play_14"])
-                await JARVIS.join_call(
-                    chat_id,
-                    original_chat_id,
-                    file_path,
-                    video=status,
-                    image=thumbnail,
-                )
-                await put_queue(
-                    chat_id,
-                    original_chat_id,
-                    file_path if direct else f"vid_{vidid}",
-                    title,
-                    duration_min,
-                    user_name,
-                    vidid,
-                    user_id,
-                    "video" if video else "audio",
-                    forceplay=forceplay,
-                )
-                img = await get_thumb(vidid)
-                button = stream_markup(_, chat_id)
-                run = await app.send_photo(
-                    original_chat_id,
-                    photo=img,
-                    caption=_["stream_1"].format(
-                        f"https://t.me/{app.username}?start=info_{vidid}",
-                        title[:23],
+                    position = len(db.get(chat_id)) - 1
+                    count += 1
+                    msg += f"{count}. {title[:70]}\n"
+                    msg += f"{_['play_20']} {position}\n\n"
+                else:
+                    if not forceplay:
+                        db[chat_id] = ChatQueue()
+                    status = True if video else None
+                    try:
+                        with metrics.span("stream.download"):
+                            file_path, direct = await YouTube.download(
+                                vidid, mystic, video=status, videoid=True, progressive=True
+                            )
+                    except:
+                        raise AssistantErr(_["play_14"])
+                    await JARVIS.join_call(
+                        chat_id,
+                        original_chat_id,
+                        file_path,
+                        video=status,
+                        image=thumbnail,
+                        duration=duration_sec,
+                    )
+                    await put_queue(
+                        chat_id,
+                        original_chat_id,
+                        file_path if direct else f"vid_{vidid}",
+                        title,
                         duration_min,
                         user_name,
-                    ),
-                    reply_markup=InlineKeyboardMarkup(button),
-                )
-                db[chat_id][0]["mystic"] = run
-                db[chat_id][0]["markup"] = "stream"
+                        vidid,
+                        user_id,
+                        "video" if video else "audio",
+                        forceplay=forceplay,
+                    )
+                    with metrics.span("stream.thumbnail"):
+                        img = await get_thumb(vidid)
+                    button = stream_markup(_, chat_id)
+                    run = await app.send_photo(
+                        original_chat_id,
+                        photo=img,
+                        caption=_["stream_1"].format(
+                            f"https://t.me/{app.username}?start=info_{vidid}",
+                            title[:23],
+                            duration_min,
+                            user_name,
+                        ),
+                        reply_markup=InlineKeyboardMarkup(button),
+                    )
+                    db[chat_id][0]["mystic"] = run
+                    db[chat_id][0]["markup"] = "stream"
         if count == 0:
             return
         else:
@@ -166,14 +213,16 @@ async def stream(
         if current_queue is not None and len(current_queue) >= 10:
             return await app.send_message(original_chat_id, "You can't add more than 10 songs to the queue.")
 
+        active = await is_active_chat(chat_id)
         try:
-            file_path, direct = await YouTube.download(
-                vidid, mystic, videoid=True, video=status
-            )
+            with metrics.span("stream.download"):
+                file_path, direct = await YouTube.download(
+                    vidid, mystic, videoid=True, video=status, progressive=not active
+                )
         except:
             raise AssistantErr(_["play_14"])
 
-        if await is_active_chat(chat_id):
+        if active:
             await put_queue(
                 chat_id,
                 original_chat_id,
@@ -194,13 +243,14 @@ async def stream(
             )
         else:
             if not forceplay:
-                db[chat_id] = []
+                db[chat_id] = ChatQueue()
             await JARVIS.join_call(
                 chat_id,
                 original_chat_id,
                 file_path,
                 video=status,
                 image=thumbnail,
+                duration=time_to_seconds(duration_min) if duration_min else None,
             )
             await put_queue(
                 chat_id,
@@ -214,7 +264,8 @@ async def stream(
                 "video" if video else "audio",
                 forceplay=forceplay,
             )
-            img = await get_thumb(vidid)
+            with metrics.span("stream.thumbnail"):
+                img = await get_thumb(vidid)
             button = stream_markup(_, chat_id)
             run = await app.send_photo(
                 original_chat_id,
@@ -254,7 +305,7 @@ async def stream(
             )
         else:
             if not forceplay:
-                db[chat_id] = []
+                db[chat_id] = ChatQueue()
             await JARVIS.join_call(chat_id, original_chat_id, file_path, video=None)
             await put_queue(
                 chat_id,
@@ -306,7 +357,7 @@ async def stream(
             )
         else:
             if not forceplay:
-                db[chat_id] = []
+                db[chat_id] = ChatQueue()
             await JARVIS.join_call(chat_id, original_chat_id, file_path, video=status)
             await put_queue(
                 chat_id,
@@ -359,7 +410,7 @@ async def stream(
             )
         else:
             if not forceplay:
-                db[chat_id] = []
+                db[chat_id] = ChatQueue()
             n, file_path = await YouTube.video(link)
             if n == 0:
                 raise AssistantErr(_["str_3"])
@@ -382,7 +433,8 @@ async def stream(
                 "video" if video else "audio",
                 forceplay=forceplay,
             )
-            img = await get_thumb(vidid)
+            with metrics.span("stream.thumbnail"):
+                img = await get_thumb(vidid)
             button = stream_markup(_, chat_id)
             run = await app.send_photo(
                 original_chat_id,
@@ -420,7 +472,7 @@ async def stream(
             )
         else:
             if not forceplay:
-                db[chat_id] = []
+                db[chat_id] = ChatQueue()
             await JARVIS.join_call(
                 chat_id,
                 original_chat_id,
@@ -15,8 +15,8 @@ from PIL import (
     ImageFilter,
     ImageFont,
 )
-from youtubesearchpython.__future__ import VideosSearch
 from config import YOUTUBE_IMG_URL
+from XMUSIC.platforms.Youtube import search_one
 def changeImageSize(maxWidth, maxHeight, image):
     widthRatio = maxWidth / image.size[0]
     heightRatio = maxHeight / image.size[1]
@@ -66,11 +66,9 @@ async def get_thumb(videoid):
         return final_path
     url = f"https://www.youtube.com/watch?v={videoid}"
     try:
-        results = VideosSearch(url, limit=1)
-        result_data = await results.next()
-        if not result_data.get("result"):
+        result = await search_one(url)
+        if not result:
             return YOUTUBE_IMG_URL
-        result = result_data["result"][0]
         title = re.sub(r"\W+", " ", result.get("title", "Unknown Title")).title()
         duration = result.get("duration", "Unknown Duration")
         thumbnail = result["thumbnails"][0]["url"].split("?")[0]
@@ -0,0 +1,120 @@
+import asyncio
+import functools
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional
+
+MISSING = object()
+
+
+class TTLCache:
+    """Bounded LRU mapping whose entries expire ``ttl`` seconds after insert.
+
+    ``get_or_fetch`` adds single-flight loading: concurrent misses for the
+    same key share one call to ``fetch`` instead of each running their own.
+    Falsy results are kept for ``negative_ttl`` seconds when it is given.
+    """
+
+    def __init__(self, maxsize: int, ttl: float, negative_ttl: Optional[float] = None):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self.hits = 0
+        self.misses = 0
+        self._data: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self._inflight: Dict[Hashable, asyncio.Future] = {}
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        item = self._data.get(key)
+        if item is not None:
+            expires, value = item
+            if expires > time.monotonic():
+                self._data.move_to_end(key)
+                self.hits += 1
+                return value
+            del self._data[key]
+        self.misses += 1
+        return default
+
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None):
+        self._data[key] = (time.monotonic() + (self.ttl if ttl is None else ttl), value)
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+
+    def pop(self, key: Hashable, default: Any = None) -> Any:
+        item = self._data.pop(key, None)
+        return default if item is None else item[1]
+
+    def clear(self):
+        self._data.clear()
+
+    async def get_or_fetch(
+        self, key: Hashable, fetch: Callable[[], Awaitable[Any]]
+    ) -> Any:
+        value = self.get(key, MISSING)
+        if value is not MISSING:
+            return value
+        fut = self._inflight.get(key)
+        if fut is not None:
+            return await asyncio.shield(fut)
+        fut = asyncio.get_running_loop().create_future()
+        self._inflight[key] = fut
+        try:
+            value = await fetch()
+        except BaseException as e:
+            if isinstance(e, asyncio.CancelledError):
+                fut.cancel()
+            else:
+                fut.set_exception(e)
+                fut.exception()
+            raise
+        finally:
+            self._inflight.pop(key, None)
+        if value is not None:
+            negative = not value and self.negative_ttl is not None
+            self.set(key, value, self.negative_ttl if negative else None)
+        fut.set_result(value)
+        return value
+
+    def stats(self) -> Dict[str, Any]:
+        total = self.hits + self.misses
+        return {
+            "size": len(self._data),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits * 100 / total, 1) if total else 0,
+        }
+
+
+caches: Dict[str, TTLCache] = {}
+
+
+def cached(maxsize: int, ttl: float, negative_ttl: Optional[float] = None):
+    """Memoise an async function on its positional arguments.
+
+    The wrapper gains ``invalidate(*args)`` and ``remember(value, *args)`` so
+    setters can drop or overwrite the entry they just changed in Mongo.
+    """
+
+    def decorator(func):
+        cache = TTLCache(maxsize, ttl, negative_ttl)
+        caches[func.__name__] = cache
+
+        @functools.wraps(func)
+        async def wrapper(*args):
+            return await cache.get_or_fetch(args, lambda: func(*args))
+
+        wrapper.cache = cache
+        wrapper.invalidate = lambda *args: cache.pop(args)
+        wrapper.remember = lambda value, *args: cache.set(args, value)
+        return wrapper
+
+    return decorator
+
+
+def cache_stats() -> Dict[str, Dict[str, Any]]:
+    return {name: cache.stats() for name, cache in caches.items()}
@@ -7,7 +7,46 @@ MAX_CONCURRENT = int(os.getenv("MAX_CONCURRENT", str(min(64, CPU * 8))))
 CHUNK_SIZE = int(os.getenv("CHUNK_SIZE", str(64 * 1024)))
 
 YTDLP_TIMEOUT = int(os.getenv("YTDLP_TIMEOUT", "45"))
+YTDLP_WORKERS = int(os.getenv("YTDLP_WORKERS", str(min(8, CPU))))
+PLAYLIST_TTL = int(os.getenv("PLAYLIST_TTL", "900"))
 YOUTUBE_META_TTL = int(os.getenv("YOUTUBE_META_TTL", "300"))
 YOUTUBE_META_MAX = int(os.getenv("YOUTUBE_META_MAX", "2048"))
+YOUTUBE_FORMATS_TTL = int(os.getenv("YOUTUBE_FORMATS_TTL", "1800"))
 
-SEM = asyncio.Semaphore(MAX_CONCURRENT)
\ No newline at end of file
+MEDIA_CACHE_SIZE = int(os.getenv("MEDIA_CACHE_SIZE", str(4 * 1024 * 1024 * 1024)))
+MEDIA_CACHE_POLICY = os.getenv("MEDIA_CACHE_POLICY", "lru").lower()
+
+PREFETCH_AHEAD = int(os.getenv("PREFETCH_AHEAD", "2"))
+PREFETCH_CONCURRENCY = int(os.getenv("PREFETCH_CONCURRENCY", str(min(8, CPU))))
+PLAYLIST_CONCURRENCY = int(os.getenv("PLAYLIST_CONCURRENCY", "8"))
+
+PROGRESSIVE_PLAYBACK = os.getenv("PROGRESSIVE_PLAYBACK", "True").lower() in ("1", "true", "yes")
+PROGRESSIVE_BYTES = int(os.getenv("PROGRESSIVE_BYTES", str(1024 * 1024)))
+PROGRESSIVE_STALL = int(os.getenv("PROGRESSIVE_STALL", "15"))
+
+AUTO_END_DELAY = int(os.getenv("AUTO_END_DELAY", "60"))
+SEEK_COALESCE = float(os.getenv("SEEK_COALESCE", "0.35"))
+
+STREAM_QUALITY = os.getenv("STREAM_QUALITY", "auto").lower()
+QUALITY_CPU_BUSY = float(os.getenv("QUALITY_CPU_BUSY", "75"))
+QUALITY_CPU_SATURATED = float(os.getenv("QUALITY_CPU_SATURATED", "90"))
+
+CHAT_SETTINGS_TTL = int(os.getenv("CHAT_SETTINGS_TTL", "600"))
+CHAT_SETTINGS_MAX = int(os.getenv("CHAT_SETTINGS_MAX", "10000"))
+DB_CACHE_TTL = int(os.getenv("DB_CACHE_TTL", "900"))
+DB_CACHE_NEGATIVE_TTL = int(os.getenv("DB_CACHE_NEGATIVE_TTL", "300"))
+DB_CACHE_MAX = int(os.getenv("DB_CACHE_MAX", "20000"))
+
+SNAPSHOT_INTERVAL = int(os.getenv("SNAPSHOT_INTERVAL", "10"))
+SNAPSHOT_POSITION_INTERVAL = int(os.getenv("SNAPSHOT_POSITION_INTERVAL", "30"))
+RESUME_ON_BOOT = os.getenv("RESUME_ON_BOOT", "True").lower() in ("1", "true", "yes")
+
+METRICS_HOST = os.getenv("METRICS_HOST", "127.0.0.1")
+METRICS_PORT = int(os.getenv("METRICS_PORT", "0"))
+
+ASSISTANT_VIDEO_WEIGHT = float(os.getenv("ASSISTANT_VIDEO_WEIGHT", "3"))
+ASSISTANT_ERROR_WINDOW = int(os.getenv("ASSISTANT_ERROR_WINDOW", "600"))
+ASSISTANT_REBALANCE = os.getenv("ASSISTANT_REBALANCE", "False").lower() in ("1", "true", "yes")
+ASSISTANT_REBALANCE_INTERVAL = int(os.getenv("ASSISTANT_REBALANCE_INTERVAL", "300"))
+
+SEM = asyncio.Semaphore(MAX_CONCURRENT)
@@ -55,6 +55,12 @@ STRING3 = getenv("STRING_SESSION3")
 STRING4 = getenv("STRING_SESSION4")
 STRING5 = getenv("STRING_SESSION5")
 
+# Assistant N uses STRING_SESSIONS[N - 1]; sessions past the fifth are read
+# from STRING_SESSION6, STRING_SESSION7, ... until the first unset one.
+STRING_SESSIONS = [STRING1, STRING2, STRING3, STRING4, STRING5]
+while getenv(f"STRING_SESSION{len(STRING_SESSIONS) + 1}"):
+    STRING_SESSIONS.append(getenv(f"STRING_SESSION{len(STRING_SESSIONS) + 1}"))
+
 START_VIDS = [
     "https://files.catbox.moe/45g50h.mp4",
 ]